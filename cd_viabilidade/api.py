@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
+import copy
+import time
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from pydantic import BaseModel
 
 from .cli import execute_scenario, generate_report
@@ -15,6 +20,12 @@ from .scenarios import ScenarioConfig
 logger = configure_logging(logger_name=__name__)
 app = FastAPI(title="API de Viabilidade Logística")
 
+CONFIG = AppConfig()
+REPORT_CACHE_TTL_SECONDS = 300.0
+REPORT_PREVIEW_CHARS = 500
+_report_cache: dict[str, tuple[float, Path]] = {}
+_SCENARIO_INPUT_FILES = ("facilities.csv", "clients.csv", "fixed_costs.csv", "regional_costs.csv")
+
 
 class OptimizeRequest(BaseModel):
     scenario_name: str = "custom"
@@ -24,6 +35,124 @@ class OptimizeRequest(BaseModel):
     limite_novos_cds: int | None = None
 
 
+def get_config() -> AppConfig:
+    """Dependência FastAPI com a configuração compartilhada da aplicação."""
+    return CONFIG
+
+
+def _input_signature(config: AppConfig) -> tuple[tuple[str, int, int] | None, ...]:
+    """Identifica a versão dos CSVs de entrada por ``(nome, mtime_ns, tamanho)``."""
+    signature = []
+    for name in _SCENARIO_INPUT_FILES:
+        try:
+            stat = (config.data_dir / name).stat()
+        except FileNotFoundError:
+            signature.append(None)
+            continue
+        signature.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+@lru_cache(maxsize=64)
+def _cached_scenario(
+    config: AppConfig,
+    scenario_name: str,
+    scenario: ScenarioConfig,
+    input_signature: tuple[tuple[str, int, int] | None, ...],
+) -> dict:
+    return execute_scenario(config, scenario_name=scenario_name, scenario=scenario)
+
+
+def _run_scenario(config: AppConfig, scenario_name: str, scenario: ScenarioConfig) -> dict:
+    """Executa o cenário ou reaproveita o resultado enquanto os CSVs de entrada não mudarem.
+
+    O resultado em cache é compartilhado; quem o entrega a chamadores (``ScenarioBatcher``)
+    faz a cópia.
+    """
+    return _cached_scenario(config, scenario_name, scenario, _input_signature(config))
+
+
+class ScenarioBatcher:
+    """Agrupa requisições de cenário que chegam em uma janela curta e executa cada cenário único uma vez.
+
+    Requisições idênticas (mesma configuração, nome e :class:`ScenarioConfig`) dentro do lote
+    compartilham a mesma execução; cada chamador recebe sua própria cópia do resultado
+    (o resultado em cache nunca é entregue diretamente).
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[AppConfig, str, ScenarioConfig], dict],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 50.0,
+    ) -> None:
+        self.runner = runner
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000.0
+        self._queue: asyncio.Queue | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._consumer: asyncio.Task | None = None
+
+    async def submit(self, config: AppConfig, scenario_name: str, scenario: ScenarioConfig) -> dict:
+        """Enfileira o cenário e aguarda o resultado do lote em que ele for executado."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._consumer is None or self._consumer.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._consumer = loop.create_task(self._consume())
+        future = loop.create_future()
+        await self._queue.put(((config, scenario_name, scenario), future))
+        return await future
+
+    async def _next_batch(self) -> list[tuple[tuple[AppConfig, str, ScenarioConfig], asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _consume(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            waiters: dict[tuple[AppConfig, str, ScenarioConfig], list[asyncio.Future]] = {}
+            for key, future in batch:
+                waiters.setdefault(key, []).append(future)
+            logger.info("Lote /optimize com %d requisições e %d cenários únicos", len(batch), len(waiters))
+
+            keys = list(waiters)
+            results = await asyncio.gather(
+                *(asyncio.to_thread(self.runner, *key) for key in keys),
+                return_exceptions=True,
+            )
+            for key, result in zip(keys, results):
+                for future in waiters[key]:
+                    if future.done():
+                        continue
+                    if isinstance(result, BaseException):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(copy.deepcopy(result))
+
+
+def _report_path(config: AppConfig) -> Path:
+    """Reaproveita o relatório executivo gerado há menos de ``REPORT_CACHE_TTL_SECONDS``."""
+    cached = _report_cache.get(str(config.output_dir))
+    if cached is not None and time.monotonic() - cached[0] < REPORT_CACHE_TTL_SECONDS and cached[1].exists():
+        return cached[1]
+    report_path = Path(generate_report(config))
+    _report_cache[str(config.output_dir)] = (time.monotonic(), report_path)
+    return report_path
+
+
+_optimize_batcher = ScenarioBatcher(lambda config, name, scenario: _run_scenario(config, name, scenario))
+
+
 @app.get("/health")
 def healthcheck() -> dict:
     """Endpoint simples de saúde."""
@@ -31,7 +160,7 @@ def healthcheck() -> dict:
 
 
 @app.post("/optimize")
-def optimize(payload: OptimizeRequest) -> dict:
+async def optimize(payload: OptimizeRequest, config: AppConfig = Depends(get_config)) -> dict:
     """Executa otimização com parâmetros de cenário enviados no payload."""
     logger.info("Recebida requisição /optimize para cenário %s", payload.scenario_name)
     scenario = ScenarioConfig(
@@ -40,12 +169,13 @@ def optimize(payload: OptimizeRequest) -> dict:
         fator_salarial=payload.fator_salarial,
         limite_novos_cds=payload.limite_novos_cds,
     )
-    return execute_scenario(AppConfig(), scenario_name=payload.scenario_name, scenario=scenario)
+    return await _optimize_batcher.submit(config, payload.scenario_name, scenario)
 
 
 @app.get("/report")
-def report() -> dict:
+async def report(config: AppConfig = Depends(get_config)) -> dict:
     """Gera relatório executivo e retorna caminho/preview."""
-    report_path = generate_report(AppConfig())
-    preview = Path(report_path).read_text(encoding="utf-8")[:500]
+    report_path = await asyncio.to_thread(_report_path, config)
+    with report_path.open("r", encoding="utf-8") as fh:
+        preview = fh.read(REPORT_PREVIEW_CHARS)
     return {"report_path": str(report_path), "preview": preview}
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+import numpy as np
 import pandas as pd
 
 from .logging_config import configure_logging
@@ -21,10 +22,11 @@ class CostEstimationConfig:
     custo_inbound_base: float = 80_000.0
 
 
-def _safe_series(df: pd.DataFrame, column: str, default: float) -> pd.Series:
-    if column in df.columns:
-        return pd.to_numeric(df[column], errors="coerce").fillna(default)
-    return pd.Series(default, index=df.index, dtype=float)
+def _safe_array(df: pd.DataFrame, column: str, default: float) -> np.ndarray:
+    if column not in df.columns:
+        return np.full(len(df), default, dtype=float)
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return np.where(np.isnan(values), default, values)
 
 
 def estimate_fixed_costs(
@@ -58,28 +60,33 @@ def estimate_fixed_costs(
     if merged[["labor_cost_index", "real_estate_cost_m2", "tax_factor", "transport_factor"]].isna().any().any():
         raise ValueError("Há facilities sem parâmetros regionais. Verifique correspondência de UF em regional_costs.csv")
 
-    capacidade_m2 = _safe_series(merged, "capacidade_m2", cfg.capacidade_padrao_m2)
-    ocupacao = _safe_series(merged, "ocupacao", 0.75).clip(lower=0.1, upper=1.0)
+    capacidade_m2 = _safe_array(merged, "capacidade_m2", cfg.capacidade_padrao_m2)
+    ocupacao = np.clip(_safe_array(merged, "ocupacao", 0.75), 0.1, 1.0)
+    labor_cost_index = merged["labor_cost_index"].to_numpy(dtype=float)
+    real_estate_cost_m2 = merged["real_estate_cost_m2"].to_numpy(dtype=float)
+    tax_factor = merged["tax_factor"].to_numpy(dtype=float)
+    transport_factor = merged["transport_factor"].to_numpy(dtype=float)
 
-    labor_cost = merged["labor_cost_index"].astype(float) * ocupacao * 250_000.0
-    real_estate_cost = merged["real_estate_cost_m2"].astype(float) * capacidade_m2
-    utilities = (labor_cost + real_estate_cost) * cfg.custo_utilidades_pct
-    overhead = (labor_cost + real_estate_cost) * cfg.custo_overhead_pct
-    inbound_cost = cfg.custo_inbound_base * merged["transport_factor"].astype(float)
+    labor_cost = labor_cost_index * ocupacao * 250_000.0
+    real_estate_cost = real_estate_cost_m2 * capacidade_m2
+    base_cost = labor_cost + real_estate_cost
+    utilities = base_cost * cfg.custo_utilidades_pct
+    overhead = base_cost * cfg.custo_overhead_pct
+    inbound_cost = cfg.custo_inbound_base * transport_factor
 
-    operational = labor_cost + real_estate_cost + utilities + overhead + inbound_cost
-    total_fixed = operational * (1.0 + merged["tax_factor"].astype(float))
+    operational = base_cost + utilities + overhead + inbound_cost
+    total_fixed = operational * (1.0 + tax_factor)
 
     out = pd.DataFrame(
         {
-            "facility_id": merged["facility_id"].astype(str),
-            "labor_cost": labor_cost.round(2),
-            "real_estate_cost": real_estate_cost.round(2),
-            "utilities_cost": utilities.round(2),
-            "overhead_cost": overhead.round(2),
-            "inbound_cost": inbound_cost.round(2),
-            "tax_factor": merged["tax_factor"].astype(float).round(4),
-            "fixed_cost": total_fixed.round(2),
+            "facility_id": merged["facility_id"].astype(str).to_numpy(),
+            "labor_cost": np.round(labor_cost, 2),
+            "real_estate_cost": np.round(real_estate_cost, 2),
+            "utilities_cost": np.round(utilities, 2),
+            "overhead_cost": np.round(overhead, 2),
+            "inbound_cost": np.round(inbound_cost, 2),
+            "tax_factor": np.round(tax_factor, 4),
+            "fixed_cost": np.round(total_fixed, 2),
         }
     )
     logger.info("Custos fixos estimados automaticamente para %d facilities", len(out))
@@ -3,24 +3,30 @@
 from __future__ import annotations
 
 import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from .auto_costs import estimate_fixed_costs
 from .config import AppConfig
-from .auto_costs import estimate_fixed_costs
-from .cost_matrix import build_cost_matrix
+from .cost_matrix import build_cost_matrix, cached_distance_grid
 from .data_io import load_csv
 from .facility_location import solve_facility_location
 from .financials import calculate_financial_indicators, compute_financials
 from .logging_config import configure_logging
 from .mapping import build_map
 from .reporting import generate_executive_report, write_markdown_report
-from .scenarios import DEFAULT_SCENARIOS, ScenarioConfig, run_scenarios_batch
+from .scenarios import DEFAULT_SCENARIOS, ScenarioConfig, build_comparative_table, summarize_scenario
 
 logger = configure_logging(logger_name=__name__)
 
+# Valores de ``is_existing`` já normalizados com ``str.strip().str.lower()``.
+EXISTING_FLAG_VALUES = ("1", "true", "yes", "sim")
+
 
 def _demand_column(df: pd.DataFrame) -> str:
     return "demanda" if "demanda" in df.columns else "demand"
@@ -41,47 +47,87 @@ def _resolve_fixed_costs(config: AppConfig, facilities: pd.DataFrame) -> pd.Data
     raise FileNotFoundError("Forneça data/fixed_costs.csv ou data/regional_costs.csv para estimar custos")
 
 
+@dataclass(frozen=True)
+class PipelineInputs:
+    """Dados de entrada carregados uma única vez e compartilhados entre cenários.
+
+    Mantém a grade de distâncias ``(F, C)`` e memoiza a matriz de custos por
+    combinação de parâmetros de cenário que a afetam.
+    """
+
+    facilities: pd.DataFrame
+    clients: pd.DataFrame
+    fixed_costs: pd.DataFrame
+    distance_grid: np.ndarray
+    _cost_matrices: dict[tuple[float, float, float], pd.DataFrame] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+    def scenario_clients(self, scenario: ScenarioConfig) -> pd.DataFrame:
+        """Retorna os clientes com a coluna ``demanda`` ajustada pelo crescimento do cenário."""
+        clients = self.clients.copy()
+        clients["demanda"] = clients[_demand_column(clients)].astype(float) * (1 + scenario.crescimento_demanda)
+        return clients
+
+    def cost_matrix(self, scenario: ScenarioConfig) -> pd.DataFrame:
+        """Retorna a matriz de custos do cenário, reaproveitando a grade de distâncias."""
+        key = (scenario.crescimento_demanda, scenario.fator_tributario, scenario.fator_salarial)
+        if key not in self._cost_matrices:
+            self._cost_matrices[key] = build_cost_matrix(
+                self.facilities,
+                self.scenario_clients(scenario),
+                scenario_params={
+                    "tributacao": scenario.fator_tributario,
+                    "salario_logistica": scenario.fator_salarial,
+                },
+                distance_grid=self.distance_grid,
+            )
+        return self._cost_matrices[key]
+
+
+def load_pipeline_inputs(config: AppConfig) -> PipelineInputs:
+    """Carrega facilities, clientes e custos fixos e pré-calcula a grade de distâncias."""
+    facilities = load_csv(config.data_dir / "facilities.csv")
+    clients = load_csv(config.data_dir / "clients.csv")
+    return PipelineInputs(
+        facilities=facilities,
+        clients=clients,
+        fixed_costs=_resolve_fixed_costs(config, facilities),
+        distance_grid=cached_distance_grid(facilities, clients),
+    )
+
+
 def _resolve_facility_groups(facilities: pd.DataFrame) -> tuple[list[str], list[str]]:
     """Retorna (existing, candidates) com base em `is_existing` quando disponível."""
     if "is_existing" not in facilities.columns:
         all_ids = facilities["facility_id"].astype(str).tolist()
         return [], all_ids
 
-    flags = facilities["is_existing"].astype(str).str.lower().map({"1": True, "true": True, "yes": True, "sim": True})
-    is_existing = flags.astype("boolean").fillna(False)
+    flags = facilities["is_existing"].astype(str).str.strip().str.lower()
+    is_existing = flags.isin(EXISTING_FLAG_VALUES).to_numpy()
 
     existing = facilities.loc[is_existing, "facility_id"].astype(str).tolist()
     candidates = facilities.loc[~is_existing, "facility_id"].astype(str).tolist()
     return existing, candidates
 
 
-def execute_scenario(config: AppConfig, scenario_name: str = "base", scenario: ScenarioConfig | None = None) -> dict:
-    """Executa cenário único, salva artefatos e retorna resumo."""
-    scenario_cfg = scenario or DEFAULT_SCENARIOS.get(scenario_name, ScenarioConfig())
-
-    facilities = load_csv(config.data_dir / "facilities.csv")
-    clients = load_csv(config.data_dir / "clients.csv")
-    fixed_costs_path = config.data_dir / "fixed_costs.csv"
-    regional_costs_path = config.data_dir / "regional_costs.csv"
+def execute_scenario(
+    config: AppConfig,
+    scenario_name: str = "base",
+    scenario: ScenarioConfig | None = None,
+    inputs: PipelineInputs | None = None,
+) -> dict:
+    """Executa cenário único, salva artefatos e retorna resumo.
 
-    if fixed_costs_path.exists():
-        fixed_costs = load_csv(fixed_costs_path)
-    elif regional_costs_path.exists():
-        regional_costs = load_csv(regional_costs_path)
-        fixed_costs = estimate_fixed_costs(facilities, regional_costs)
-        config.output_dir.mkdir(parents=True, exist_ok=True)
-        fixed_costs.to_csv(config.output_dir / "fixed_costs_estimados.csv", index=False)
-    else:
-        raise FileNotFoundError("Forneça data/fixed_costs.csv ou data/regional_costs.csv para estimar custos")
+    ``inputs`` permite reaproveitar dados já carregados ao executar vários cenários.
+    """
+    scenario_cfg = scenario or DEFAULT_SCENARIOS.get(scenario_name, ScenarioConfig())
+    inputs = inputs or load_pipeline_inputs(config)
 
-    cost_matrix = build_cost_matrix(
-        facilities,
-        scenario_clients,
-        scenario_params={
-            "tributacao": scenario_cfg.fator_tributario,
-            "salario_logistica": scenario_cfg.fator_salarial,
-        },
-    )
+    facilities = inputs.facilities
+    fixed_costs = inputs.fixed_costs
+    scenario_clients = inputs.scenario_clients(scenario_cfg)
+    cost_matrix = inputs.cost_matrix(scenario_cfg)
 
     existing, candidates = _resolve_facility_groups(facilities)
 
@@ -102,9 +148,13 @@ def execute_scenario(config: AppConfig, scenario_name: str = "base", scenario: S
         forced_open_facilities=existing,
         candidate_facilities=candidates,
         min_total_open_facilities=min_total_open,
+        threads=config.solver_threads,
     )
     assignments = pd.DataFrame(
-        [{"client_id": client, "facility_id": facility} for client, facility in result.allocation.items()]
+        {
+            "client_id": list(result.allocation.keys()),
+            "facility_id": list(result.allocation.values()),
+        }
     )
     summary = compute_financials(assignments, cost_matrix, config.default_unit_revenue, result.fixed_cost)
 
@@ -130,11 +180,31 @@ def execute_scenario(config: AppConfig, scenario_name: str = "base", scenario: S
         "total_cost": result.total_cost,
         "fixed_cost": result.fixed_cost,
         "variable_cost": result.variable_cost,
+        "total_freight_cost": float(cost_matrix["freight_cost"].sum()),
+        "total_demand": float(cost_matrix["demanda"].sum()),
         "report": str(report_path),
         "map": str(map_path),
     }
 
 
+def _execute_scenarios(config: AppConfig, scenario_names: list[str], inputs: PipelineInputs) -> dict[str, dict]:
+    """Executa cenários independentes, em paralelo por processos quando há mais de um worker.
+
+    Os processos usam ``spawn``: ``fork`` herdaria pools de threads já iniciados
+    (numba, servidor da API) e pode travar o processo filho.
+    """
+    workers = min(len(scenario_names), config.scenario_workers)
+    if workers <= 1:
+        return {name: execute_scenario(config, name, inputs=inputs) for name in scenario_names}
+
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        futures = {executor.submit(execute_scenario, config, name, None, inputs): name for name in scenario_names}
+        outputs = {futures[future]: future.result() for future in as_completed(futures)}
+    logger.info("%d cenários executados com %d processos", len(outputs), workers)
+    return {name: outputs[name] for name in scenario_names}
+
+
 def run_pipeline(config: AppConfig, scenario_name: str = "base") -> dict:
     """Executa pipeline completo para um cenário."""
     out = execute_scenario(config=config, scenario_name=scenario_name)
@@ -142,26 +212,33 @@ def run_pipeline(config: AppConfig, scenario_name: str = "base") -> dict:
     return out
 
 
-def run_scenarios(config: AppConfig) -> pd.DataFrame:
-    """Executa cenários em lote e salva comparativo."""
-    facilities = load_csv(config.data_dir / "facilities.csv")
-    clients = load_csv(config.data_dir / "clients.csv")
+def run_scenarios(config: AppConfig, inputs: PipelineInputs | None = None) -> pd.DataFrame:
+    """Executa cenários em lote e salva comparativo.
 
-    comparative = run_scenarios_batch(facilities, clients, DEFAULT_SCENARIOS)
+    O comparativo é montado a partir dos totais devolvidos por cada execução,
+    em uma única passada sobre os cenários.
+    """
+    inputs = inputs or load_pipeline_inputs(config)
+
+    scenario_outputs = _execute_scenarios(config, list(DEFAULT_SCENARIOS), inputs)
+    comparative = build_comparative_table(
+        [
+            summarize_scenario(name, DEFAULT_SCENARIOS[name], out["total_freight_cost"], out["total_demand"])
+            for name, out in scenario_outputs.items()
+        ]
+    )
     output_path = config.output_dir / "comparativo_cenarios.csv"
     output_path.parent.mkdir(parents=True, exist_ok=True)
     comparative.to_csv(output_path, index=False)
 
-    for scenario_name in DEFAULT_SCENARIOS:
-        execute_scenario(config, scenario_name)
-
     logger.info("Comparativo de cenários salvo em %s", output_path)
     return comparative
 
 
-def generate_report(config: AppConfig) -> Path:
+def generate_report(config: AppConfig, inputs: PipelineInputs | None = None) -> Path:
     """Gera relatório executivo consolidando todos os cenários configurados."""
-    scenario_outputs = {name: execute_scenario(config, name) for name in DEFAULT_SCENARIOS}
+    inputs = inputs or load_pipeline_inputs(config)
+    scenario_outputs = _execute_scenarios(config, list(DEFAULT_SCENARIOS), inputs)
 
     horizon = 5
     rate = 0.12
@@ -180,6 +257,13 @@ def generate_report(config: AppConfig) -> Path:
     return generate_executive_report(scenario_costs, scenario_indicators, output_dir=config.output_dir)
 
 
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"deve ser um inteiro >= 1: {value}")
+    return number
+
+
 def build_parser() -> argparse.ArgumentParser:
     """Cria parser de argumentos do CLI."""
     parser = argparse.ArgumentParser(description="Pipeline de viabilidade logística")
@@ -187,6 +271,18 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--output-dir", type=Path, default=AppConfig().output_dir)
     parser.add_argument("--facility-limit", type=int, default=AppConfig().default_facility_limit)
     parser.add_argument("--unit-revenue", type=float, default=AppConfig().default_unit_revenue)
+    parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=AppConfig().scenario_workers,
+        help="Processos para executar cenários em lote (padrão: 1, execução serial)",
+    )
+    parser.add_argument(
+        "--solver-threads",
+        type=_positive_int,
+        default=AppConfig().solver_threads,
+        help="Threads do CBC por cenário; o total é workers x solver-threads (padrão: 1)",
+    )
 
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -208,6 +304,8 @@ def main() -> None:
         output_dir=args.output_dir,
         default_facility_limit=args.facility_limit,
         default_unit_revenue=args.unit_revenue,
+        scenario_workers=args.workers,
+        solver_threads=args.solver_threads,
     )
 
     if args.command == "run-pipeline":
@@ -13,3 +13,5 @@ class AppConfig:
     output_dir: Path = base_dir / "outputs"
     default_facility_limit: int = 2
     default_unit_revenue: float = 150.0
+    scenario_workers: int = 1
+    solver_threads: int = 1
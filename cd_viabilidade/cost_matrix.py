@@ -2,44 +2,305 @@
 
 from __future__ import annotations
 
+import hashlib
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Any, Dict, Tuple
 
+import numpy as np
 import pandas as pd
-from geopy.distance import distance
+
+try:
+    from numba import njit, prange
+except ModuleNotFoundError:  # pragma: no cover - fallback para ambientes sem numba
+    njit = None
+    prange = range
 
 from .logging_config import configure_logging
 
 logger = configure_logging(logger_name=__name__)
 
 
+EARTH_RADIUS_KM = 6371.0088
+
+# A coluna ``distance_km`` de saída cabe em float32 (~7 dígitos); grades usadas no frete e custos seguem em float64.
+DISTANCE_DTYPE = np.float32
+DISTANCE_CACHE_SIZE = 4
+_distance_cache: "OrderedDict[tuple[str, str], np.ndarray]" = OrderedDict()
+
 DEFAULT_SCENARIO_PARAMS: Dict[str, float] = {
     "tributacao": 0.0,
     "salario_logistica": 1.0,
 }
 
 
-def _safe_distance_km(
-    demand_lat: Any,
-    demand_lon: Any,
-    candidate_lat: Any,
-    candidate_lon: Any,
-) -> float | None:
-    """Calcula distância em km entre dois pontos, retornando ``None`` se houver ausência de coordenadas."""
-    if pd.isna(demand_lat) or pd.isna(demand_lon) or pd.isna(candidate_lat) or pd.isna(candidate_lon):
-        return None
-    return float(distance((demand_lat, demand_lon), (candidate_lat, candidate_lon)).km)
+@dataclass(frozen=True)
+class DenseCostMatrix:
+    """Matriz de custos densa ``(F, C)`` com os rótulos de instalações e clientes."""
+
+    freight_cost: np.ndarray
+    distance_km: np.ndarray
+    demand: np.ndarray
+    facility_ids: pd.Index
+    client_ids: pd.Index
+    tributacao: float
+    salario_logistica: float
+
+    def to_long(self) -> pd.DataFrame:
+        """Materializa a matriz no formato longo (uma linha por par instalação-cliente).
+
+        Os parâmetros de cenário, constantes em todas as linhas, ficam em
+        ``DataFrame.attrs`` (``tributacao`` e ``salario_logistica``).
+
+        As colunas são preenchidas em arrays pré-alocados de tamanho ``F * C`` e as
+        grades de distância/frete entram como visões, sem cópia adicional.
+        """
+        shape = self.freight_cost.shape
+        facility_ids = self.facility_ids.to_numpy()
+        client_ids = self.client_ids.to_numpy()
+
+        out_facility = np.empty(shape, dtype=facility_ids.dtype)
+        out_facility[:] = facility_ids[:, None]
+        out_client = np.empty(shape, dtype=client_ids.dtype)
+        out_client[:] = client_ids[None, :]
+        out_demand = np.empty(shape, dtype=self.demand.dtype)
+        out_demand[:] = self.demand[None, :]
+
+        long_df = pd.DataFrame(
+            {
+                "facility_id": out_facility.ravel(),
+                "client_id": out_client.ravel(),
+                "demanda": out_demand.ravel(),
+                "distance_km": self.distance_km.ravel(),
+                "freight_cost": self.freight_cost.ravel(),
+            },
+            copy=False,
+        )
+        long_df.attrs["tributacao"] = self.tributacao
+        long_df.attrs["salario_logistica"] = self.salario_logistica
+        return long_df
+
+    def to_pivot(self) -> pd.DataFrame:
+        """Retorna o frete como tabela cliente x instalação, sem passar pelo ``pivot`` do pandas."""
+        pivot_df = pd.DataFrame(self.freight_cost.T, index=self.client_ids, columns=self.facility_ids)
+        return pivot_df.sort_index().sort_index(axis=1)
+
+
+def _haversine_km(
+    candidate_lat: np.ndarray,
+    candidate_lon: np.ndarray,
+    demand_lat: np.ndarray,
+    demand_lon: np.ndarray,
+) -> np.ndarray:
+    """Calcula a grade ``(F, C)`` de distâncias em km pela fórmula de haversine.
+
+    Coordenadas ausentes (``NaN``) propagam ``NaN`` para as distâncias correspondentes.
+    """
+    lat_f = np.radians(candidate_lat)[:, None]
+    lon_f = np.radians(candidate_lon)[:, None]
+    lat_c = np.radians(demand_lat)[None, :]
+    lon_c = np.radians(demand_lon)[None, :]
+
+    a = np.sin((lat_c - lat_f) / 2) ** 2 + np.cos(lat_f) * np.cos(lat_c) * np.sin((lon_c - lon_f) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _cost_kernel(
+    lat_f: np.ndarray,
+    lon_f: np.ndarray,
+    lat_c: np.ndarray,
+    lon_c: np.ndarray,
+    demand: np.ndarray,
+    tarifa_km: float,
+    tributacao: float,
+    salario_logistica: float,
+    dist_out: np.ndarray,
+    freight_out: np.ndarray,
+) -> None:
+    """Calcula distância (haversine) e frete em uma única passada sobre a grade ``(F, C)``.
+
+    Recebe coordenadas em radianos e escreve diretamente em ``dist_out`` e ``freight_out``.
+    """
+    factor = tarifa_km * (1.0 + tributacao) * salario_logistica
+    for i in prange(lat_f.shape[0]):
+        cos_lat_f = math.cos(lat_f[i])
+        for j in range(lat_c.shape[0]):
+            sin_dlat = math.sin((lat_c[j] - lat_f[i]) / 2.0)
+            sin_dlon = math.sin((lon_c[j] - lon_f[i]) / 2.0)
+            a = sin_dlat * sin_dlat + cos_lat_f * math.cos(lat_c[j]) * sin_dlon * sin_dlon
+            dist_km = 2.0 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+            dist_out[i, j] = dist_km
+            freight_out[i, j] = demand[j] * dist_km * factor
+
+
+if njit is not None:
+    # ``fastmath`` fica desligado para preservar a propagação de NaN de coordenadas ausentes.
+    # A compilação é preguiçosa (primeira chamada, com cache em disco) para não iniciar o
+    # pool de threads do numba em todo processo que importa o pacote.
+    _cost_kernel = njit(parallel=True, cache=True)(_cost_kernel)
 
 
 def _compute_freight_cost(
-    demand: float,
-    distance_km: float,
+    demand: Any,
+    distance_km: Any,
+    tarifa_km: float,
+    tributacao: float,
+    salario_logistica: float,
+) -> Any:
+    """Calcula custo de frete com parâmetros de cenário (escalares ou arrays).
+
+    Aplica o fator combinado na mesma ordem de ``_cost_kernel``, para que os caminhos
+    NumPy e numba produzam os mesmos valores.
+    """
+    factor = tarifa_km * (1.0 + tributacao) * salario_logistica
+    return demand * distance_km * factor
+
+
+def _distance_and_freight(
+    candidate_lat: np.ndarray,
+    candidate_lon: np.ndarray,
+    demand_lat: np.ndarray,
+    demand_lon: np.ndarray,
+    demand: np.ndarray,
+    *,
     tarifa_km: float,
     tributacao: float,
     salario_logistica: float,
-) -> float:
-    """Calcula custo de frete com parâmetros de cenário."""
-    base_cost = demand * distance_km * tarifa_km
-    return float(base_cost * (1 + tributacao) * salario_logistica)
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Retorna as grades ``(F, C)`` de distância e frete, usando o kernel numba quando disponível."""
+    if njit is None:
+        dist_km = _haversine_km(candidate_lat, candidate_lon, demand_lat, demand_lon)
+        freight = _compute_freight_cost(
+            demand=demand[None, :],
+            distance_km=dist_km,
+            tarifa_km=tarifa_km,
+            tributacao=tributacao,
+            salario_logistica=salario_logistica,
+        )
+        return dist_km, freight
+
+    shape = (len(candidate_lat), len(demand_lat))
+    dist_km = np.empty(shape, dtype=np.float64)
+    freight = np.empty(shape, dtype=np.float64)
+    _cost_kernel(
+        np.radians(candidate_lat),
+        np.radians(candidate_lon),
+        np.radians(demand_lat),
+        np.radians(demand_lon),
+        demand,
+        float(tarifa_km),
+        tributacao,
+        salario_logistica,
+        dist_km,
+        freight,
+    )
+    return dist_km, freight
+
+
+def _coordinate_arrays(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Extrai ``lat``/``lon`` como arrays ``float64`` (ausências viram ``NaN``)."""
+    return (
+        pd.to_numeric(df["lat"]).to_numpy(dtype=float, na_value=np.nan),
+        pd.to_numeric(df["lon"]).to_numpy(dtype=float, na_value=np.nan),
+    )
+
+
+def build_distance_grid(candidates: pd.DataFrame, demand_points: pd.DataFrame) -> np.ndarray:
+    """Calcula a grade ``(F, C)`` de distâncias em km, reutilizável entre cenários.
+
+    A grade fica em ``float64``: o frete calculado a partir dela coincide com o do kernel
+    sem grade. Só a coluna ``distance_km`` de saída é reduzida a ``DISTANCE_DTYPE``.
+    """
+    return _haversine_km(*_coordinate_arrays(candidates), *_coordinate_arrays(demand_points))
+
+
+def _coordinates_digest(df: pd.DataFrame) -> str:
+    hashed = pd.util.hash_pandas_object(df[["lat", "lon"]], index=False).to_numpy()
+    return hashlib.blake2b(hashed.tobytes(), digest_size=16).hexdigest()
+
+
+def cached_distance_grid(candidates: pd.DataFrame, demand_points: pd.DataFrame) -> np.ndarray:
+    """Retorna a grade de distâncias, reaproveitando-a enquanto as coordenadas não mudarem.
+
+    A chave é um hash das colunas ``lat``/``lon`` de cada lado, de modo que variações de
+    tarifa, demanda ou fatores de cenário reutilizam a mesma grade. O array devolvido é
+    somente leitura. Mantém as ``DISTANCE_CACHE_SIZE`` grades usadas mais recentemente.
+    """
+    key = (_coordinates_digest(candidates), _coordinates_digest(demand_points))
+    grid = _distance_cache.get(key)
+    if grid is None:
+        grid = build_distance_grid(candidates, demand_points)
+        grid.flags.writeable = False
+        _distance_cache[key] = grid
+        if len(_distance_cache) > DISTANCE_CACHE_SIZE:
+            _distance_cache.popitem(last=False)
+    else:
+        _distance_cache.move_to_end(key)
+    return grid
+
+
+def build_dense_cost_matrix(
+    candidates: pd.DataFrame,
+    demand_points: pd.DataFrame,
+    tarifa_km: float = 1.2,
+    scenario_params: Dict[str, float] | None = None,
+    distance_grid: np.ndarray | None = None,
+    demand_scale: float = 1.0,
+) -> DenseCostMatrix:
+    """Gera a matriz de custos densa ``(F, C)`` sem materializar o formato longo.
+
+    Recebe os mesmos argumentos de :func:`build_cost_matrix`.
+    """
+    params = {**DEFAULT_SCENARIO_PARAMS, **(scenario_params or {})}
+    tributacao = float(params["tributacao"])
+    salario_logistica = float(params["salario_logistica"])
+
+    n_facilities = len(candidates)
+    n_clients = len(demand_points)
+
+    if "demanda" in demand_points.columns:
+        demand = pd.to_numeric(demand_points["demanda"]).to_numpy(
+            dtype=float, na_value=np.nan, copy=demand_scale != 1.0
+        )
+        if demand_scale != 1.0:
+            demand *= demand_scale
+    else:
+        demand = np.full(n_clients, demand_scale, dtype=float)
+
+    if distance_grid is not None:
+        if distance_grid.shape != (n_facilities, n_clients):
+            raise ValueError(
+                f"distance_grid com formato {distance_grid.shape} incompatível com ({n_facilities}, {n_clients})"
+            )
+        # Grades fornecidas em ``float32`` são promovidas antes da multiplicação do frete.
+        dist_km = np.asarray(distance_grid, dtype=np.float64)
+        freight = _compute_freight_cost(
+            demand=demand[None, :],
+            distance_km=dist_km,
+            tarifa_km=tarifa_km,
+            tributacao=tributacao,
+            salario_logistica=salario_logistica,
+        )
+    else:
+        dist_km, freight = _distance_and_freight(
+            *_coordinate_arrays(candidates),
+            *_coordinate_arrays(demand_points),
+            demand,
+            tarifa_km=tarifa_km,
+            tributacao=tributacao,
+            salario_logistica=salario_logistica,
+        )
+
+    return DenseCostMatrix(
+        freight_cost=np.round(freight, 2),
+        distance_km=np.round(dist_km, 3).astype(DISTANCE_DTYPE, copy=False),
+        demand=demand,
+        facility_ids=pd.Index(candidates["facility_id"].to_numpy(), name="facility_id"),
+        client_ids=pd.Index(demand_points["client_id"].to_numpy(), name="client_id"),
+        tributacao=tributacao,
+        salario_logistica=salario_logistica,
+    )
 
 
 def build_cost_matrix(
@@ -48,6 +309,8 @@ def build_cost_matrix(
     tarifa_km: float = 1.2,
     scenario_params: Dict[str, float] | None = None,
     return_pivot: bool = False,
+    distance_grid: np.ndarray | None = None,
+    demand_scale: float = 1.0,
 ) -> pd.DataFrame | Tuple[pd.DataFrame, pd.DataFrame]:
     """Gera matriz de custos demanda-candidato.
 
@@ -59,55 +322,26 @@ def build_cost_matrix(
     e pode ser ajustada via ``scenario_params`` com:
     - ``tributacao``: percentual adicional (ex: 0.15 para 15%)
     - ``salario_logistica``: fator multiplicador de custo logístico
-    """
-    params = {**DEFAULT_SCENARIO_PARAMS, **(scenario_params or {})}
-    tributacao = float(params["tributacao"])
-    salario_logistica = float(params["salario_logistica"])
-
-    rows: list[dict[str, Any]] = []
-    for _, candidate in candidates.iterrows():
-        for _, demand_point in demand_points.iterrows():
-            demand_value = float(demand_point.get("demanda", 1.0))
-            dist_km = _safe_distance_km(
-                demand_point["lat"],
-                demand_point["lon"],
-                candidate["lat"],
-                candidate["lon"],
-            )
 
-            if dist_km is None:
-                freight_cost = pd.NA
-                distance_km = pd.NA
-            else:
-                distance_km = round(dist_km, 3)
-                freight_cost = round(
-                    _compute_freight_cost(
-                        demand=demand_value,
-                        distance_km=dist_km,
-                        tarifa_km=tarifa_km,
-                        tributacao=tributacao,
-                        salario_logistica=salario_logistica,
-                    ),
-                    2,
-                )
-
-            rows.append(
-                {
-                    "facility_id": candidate["facility_id"],
-                    "client_id": demand_point["client_id"],
-                    "demanda": demand_value,
-                    "distance_km": distance_km,
-                    "freight_cost": freight_cost,
-                    "tributacao": tributacao,
-                    "salario_logistica": salario_logistica,
-                }
-            )
-
-    long_df = pd.DataFrame(rows)
+    As distâncias são calculadas (haversine) sobre a grade completa
+    candidatos x demanda, via kernel numba se instalado ou NumPy vetorizado.
+    Uma grade pré-calculada por :func:`build_distance_grid` pode ser passada em
+    ``distance_grid`` para reaproveitar as distâncias entre cenários.
+    ``demand_scale`` multiplica a demanda (ex: ``1 + crescimento``) durante o cálculo,
+    sem exigir uma cópia escalada de ``demand_points``.
+    Para consumir só a grade ``(F, C)`` use :func:`build_dense_cost_matrix`.
+    """
+    dense = build_dense_cost_matrix(
+        candidates,
+        demand_points,
+        tarifa_km=tarifa_km,
+        scenario_params=scenario_params,
+        distance_grid=distance_grid,
+        demand_scale=demand_scale,
+    )
+    long_df = dense.to_long()
     logger.info("Matriz de custo criada com %d linhas", len(long_df))
 
     if not return_pivot:
         return long_df
-
-    pivot_df = long_df.pivot(index="client_id", columns="facility_id", values="freight_cost")
-    return long_df, pivot_df
+    return long_df, dense.to_pivot()
@@ -2,16 +2,28 @@
 
 from __future__ import annotations
 
+import csv
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Mapping
 
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ModuleNotFoundError:  # pragma: no cover - fallback para ambientes sem pyarrow
+    pa = None
+    pa_csv = None
+
 from .logging_config import configure_logging
 
 logger = configure_logging(logger_name=__name__)
 
 
+CSV_ENGINE = "c" if pa_csv is None else "pyarrow"
+INTERMEDIATE_SUFFIX = ".csv" if pa is None else ".parquet"
+
 PathLike = str | Path
 
 REQUIRED_DEMANDA_COLUMNS = ("id", "cidade", "uf", "demanda", "lat", "lon")
@@ -20,13 +32,59 @@ REQUIRED_CDS_COLUMNS = ("id", "cidade", "uf", "lat", "lon", "custo_fixo")
 
 STRING_COLUMNS = ("id", "cidade", "uf")
 NUMERIC_COLUMNS = ("demanda", "lat", "lon", "custo_fixo")
+STRING_DTYPES = {col: "string" for col in STRING_COLUMNS}
+CATEGORICAL_COLUMNS = ("uf",)
+INT32_COLUMNS = ("demanda",)
+_INT32_INFO = np.iinfo(np.int32)
+
+
+def _csv_header(path: Path) -> list[str]:
+    with path.open(newline="", encoding="utf-8-sig") as fh:
+        return next(csv.reader(fh), [])
+
+
+def _read_csv_pyarrow(path: Path, usecols: set[str] | None = None) -> pd.DataFrame:
+    if path.stat().st_size == 0:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    convert_options = pa_csv.ConvertOptions()
+    if usecols is not None:
+        # Só as colunas pedidas são convertidas; ``include_columns`` vazio leria todas.
+        convert_options.include_columns = [col for col in _csv_header(path) if col in usecols]
+        if not convert_options.include_columns:
+            return pd.DataFrame()
+    table = pa_csv.read_csv(path, convert_options=convert_options)
+    temporal_columns = {field.name: pa.string() for field in table.schema if pa.types.is_temporal(field.type)}
+    if temporal_columns:
+        # O parser C do pandas não infere datas; relê essas colunas como texto bruto.
+        convert_options.column_types = temporal_columns
+        table = pa_csv.read_csv(path, convert_options=convert_options)
+    return table.to_pandas()
+
+
+def load_csv(
+    path: PathLike,
+    engine: str | None = None,
+    *,
+    dtype: Mapping[str, str] | None = None,
+    usecols: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """Carrega um CSV em :class:`pandas.DataFrame`.
 
-
-def load_csv(path: PathLike) -> pd.DataFrame:
-    """Carrega um CSV em :class:`pandas.DataFrame`."""
+    Usa o leitor multithread do PyArrow quando instalado (``engine="pyarrow"``),
+    com os mesmos dtypes do parser C do pandas (``engine="c"``). ``usecols`` descarta
+    as demais colunas (colunas ausentes são ignoradas) e ``dtype`` fixa tipos por coluna.
+    """
     path = Path(path)
+    engine = engine or CSV_ENGINE
+    wanted = None if usecols is None else set(usecols)
     logger.info("Carregando CSV: %s", path)
-    return pd.read_csv(path)
+    if engine != "pyarrow":
+        return pd.read_csv(path, dtype=dtype, usecols=None if wanted is None else wanted.__contains__)
+
+    df = _read_csv_pyarrow(path, wanted)
+    if dtype:
+        df = df.astype({col: col_dtype for col, col_dtype in dtype.items() if col in df.columns})
+    return df
 
 
 
@@ -77,26 +135,78 @@ def _normalize_numeric_columns(df: pd.DataFrame, columns: Iterable[str], dataset
             raise ValueError(
                 f"Coluna '{col}' do dataset '{dataset_name}' possui valor/tipo numérico inválido"
             ) from exc
+        if col in INT32_COLUMNS and pd.api.types.is_integer_dtype(df[col]) and _fits_int32(df[col]):
+            df[col] = df[col].astype("int32")
+
+
+
+def _fits_int32(series: pd.Series) -> bool:
+    return series.empty or (series.min() >= _INT32_INFO.min and series.max() <= _INT32_INFO.max)
+
+
+
+def _categorize_columns(df: pd.DataFrame, columns: Iterable[str]) -> None:
+    for col in columns:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
 
 
 
-def normalize_dataframe(df: pd.DataFrame, *, dataset_name: str) -> pd.DataFrame:
-    """Normaliza tipos numéricos e strings de um DataFrame."""
-    normalized = df.copy()
+def normalize_dataframe(df: pd.DataFrame, *, dataset_name: str, copy: bool = True) -> pd.DataFrame:
+    """Normaliza tipos numéricos e strings de um DataFrame.
+
+    Colunas de baixa cardinalidade (``uf``) viram ``category`` e a demanda inteira
+    é armazenada como ``int32`` quando cabe nesse tipo. Coordenadas e custos seguem em
+    ``float64`` para não perder precisão. Com ``copy=False`` o próprio ``df`` é normalizado.
+    """
+    normalized = df.copy() if copy else df
     _normalize_string_columns(normalized, STRING_COLUMNS, dataset_name)
     _normalize_numeric_columns(normalized, NUMERIC_COLUMNS, dataset_name)
+    _categorize_columns(normalized, CATEGORICAL_COLUMNS)
     return normalized
 
 
 
 def persist_intermediate_output(df: pd.DataFrame, filename: str, output_dir: PathLike = "outputs") -> Path:
-    """Persiste um output intermediário no diretório ``outputs/``."""
+    """Persiste um output intermediário no diretório ``outputs/``.
+
+    O formato segue a extensão de ``filename``: ``.parquet`` grava Parquet (Snappy,
+    preservando os dtypes; requer pyarrow) e as demais extensões gravam CSV.
+    Use ``INTERMEDIATE_SUFFIX`` para escolher Parquet quando o pyarrow estiver instalado.
+    """
     output_path = Path(output_dir) / filename
-    save_csv(df, output_path)
+    if output_path.suffix != ".parquet":
+        save_csv(df, output_path)
+        return output_path
+
+    logger.info("Salvando Parquet: %s", output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(output_path, engine="pyarrow", compression="snappy", index=False)
     return output_path
 
 
 
+def _load_fresh_intermediate(source: Path, output_path: Path) -> pd.DataFrame | None:
+    """Retorna o Parquet normalizado se ele for estritamente mais novo que o CSV de origem e vier dele.
+
+    Mtimes iguais contam como desatualizado: uma edição no mesmo tick do relógio não é perdida.
+    """
+    if output_path.suffix != ".parquet" or not output_path.exists():
+        return None
+    if output_path.stat().st_mtime_ns <= source.stat().st_mtime_ns:
+        return None
+    cached = pd.read_parquet(output_path, engine="pyarrow")
+    if cached.attrs.get("source_path") != str(source.resolve()):
+        return None
+    for col in CATEGORICAL_COLUMNS:
+        if col in cached.columns:
+            # Parquet devolve categorias como ``str``; normalize_dataframe as cria como ``string``.
+            cached[col] = cached[col].cat.set_categories(cached[col].cat.categories.astype("string"))
+    logger.info("Reaproveitando dataset normalizado: %s", output_path)
+    return cached
+
+
+
 def _load_typed_dataset(
     path: PathLike,
     *,
@@ -105,10 +215,16 @@ def _load_typed_dataset(
     output_filename: str,
     output_dir: PathLike = "outputs",
 ) -> pd.DataFrame:
-    df = load_csv(path)
+    cached = _load_fresh_intermediate(Path(path), Path(output_dir) / output_filename)
+    if cached is not None:
+        return cached
+
+    required_columns = tuple(required_columns)
+    df = load_csv(path, dtype=STRING_DTYPES, usecols=required_columns)
     _ensure_not_empty(df, dataset_name)
     require_columns(df, required_columns)
-    normalized = normalize_dataframe(df, dataset_name=dataset_name)
+    normalized = normalize_dataframe(df, dataset_name=dataset_name, copy=False)
+    normalized.attrs["source_path"] = str(Path(path).resolve())
     persist_intermediate_output(normalized, output_filename, output_dir)
     return normalized
 
@@ -120,7 +236,7 @@ def load_demanda_csv(path: PathLike, output_dir: PathLike = "outputs") -> pd.Dat
         path,
         dataset_name="demanda",
         required_columns=REQUIRED_DEMANDA_COLUMNS,
-        output_filename="demanda_normalizada.csv",
+        output_filename=f"demanda_normalizada{INTERMEDIATE_SUFFIX}",
         output_dir=output_dir,
     )
 
@@ -132,7 +248,7 @@ def load_localidades_csv(path: PathLike, output_dir: PathLike = "outputs") -> pd
         path,
         dataset_name="localidades",
         required_columns=REQUIRED_LOCALIDADES_COLUMNS,
-        output_filename="localidades_normalizadas.csv",
+        output_filename=f"localidades_normalizadas{INTERMEDIATE_SUFFIX}",
         output_dir=output_dir,
     )
 
@@ -144,6 +260,6 @@ def load_cds_candidatos_csv(path: PathLike, output_dir: PathLike = "outputs") ->
         path,
         dataset_name="cds_candidatos",
         required_columns=REQUIRED_CDS_COLUMNS,
-        output_filename="cds_candidatos_normalizados.csv",
+        output_filename=f"cds_candidatos_normalizados{INTERMEDIATE_SUFFIX}",
         output_dir=output_dir,
     )
@@ -1,15 +1,29 @@
 """Modelo de localização de instalações com otimização linear inteira mista (MILP)."""
 
 from dataclasses import dataclass
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Set
 
+import numpy as np
 import pandas as pd
 import pulp
 
+try:
+    from scipy import sparse
+    from scipy.optimize import linprog
+except ModuleNotFoundError:  # pragma: no cover - fallback para ambientes sem scipy
+    sparse = None
+    linprog = None
+
 from .logging_config import configure_logging
 
 logger = configure_logging(logger_name=__name__)
 
+DEFAULT_GAP_REL = 1e-4
+DEFAULT_TIME_LIMIT_SECONDS = 300.0
+# Uma thread por solve: o CBC roda dentro de pools de processos (``--workers``) e de
+# threads da API, e ``os.cpu_count()`` threads por solve sobrecarregaria os núcleos.
+DEFAULT_SOLVER_THREADS = 1
+
 
 @dataclass(frozen=True)
 class SolutionResult:
@@ -22,145 +36,565 @@ class SolutionResult:
     allocation: Dict[str, str]
 
 
-def solve_facility_location(
+def _cost_column(cost_matrix: pd.DataFrame) -> str:
+    return "unit_cost" if "unit_cost" in cost_matrix.columns else "freight_cost"
+
+
+def _cost_grid(
     cost_matrix: pd.DataFrame,
-    fixed_costs: pd.DataFrame,
-    max_new_facilities: int | None = None,
-    capacity_by_facility: Dict[str, float] | None = None,
-    demand_by_client: Dict[str, float] | None = None,
-    forced_open_facilities: Iterable[str] | None = None,
-    candidate_facilities: Iterable[str] | None = None,
-    min_total_open_facilities: int | None = None,
- ) -> SolutionResult:
-     """Resolve o problema de localização de instalações com atribuição única por demanda.
-+
-+    # Normaliza/valida interseção entre instalações forçadas abertas e candidatas
-+    if forced_open_facilities is not None and candidate_facilities is not None:
-+        forced_open_set = set(forced_open_facilities)
-+        candidate_set = set(candidate_facilities)
-+        intersection = forced_open_set & candidate_set
-+
-+        if intersection:
-+            # Se o número máximo de novas instalações for menor que a interseção,
-+            # o modelo ficaria inviável pela combinação das restrições.
-+            if max_new_facilities is not None and len(intersection) > max_new_facilities:
-+                raise ValueError(
-+                    "Configuração inválida: existem instalações em comum entre "
-+                    "`forced_open_facilities` e `candidate_facilities` cujo número "
-+                    "excede `max_new_facilities`, o que tornaria o problema inviável. "
-+                    f"Instalações em conflito: {sorted(intersection)}"
-+                )
-+
-+            # Remove as instalações já forçadas abertas do conjunto de candidatas
-+            candidate_facilities = [f for f in candidate_facilities if f not in forced_open_set]
+    cost_column: str,
+    facilities: List[str],
+    clients: List[str],
+) -> np.ndarray:
+    """Pivota a matriz longa em uma grade densa ``facility × client`` na ordem do modelo.
+
+    Pares ausentes (ou com custo nulo) interrompem a modelagem com ``ValueError``.
+    """
+    grid = (
+        cost_matrix.assign(
+            facility_id=cost_matrix["facility_id"].astype(str),
+            client_id=cost_matrix["client_id"].astype(str),
+        )
+        .pivot(index="facility_id", columns="client_id", values=cost_column)
+        .reindex(index=facilities, columns=clients)
+        .to_numpy(dtype=float)
+    )
+    missing = np.argwhere(np.isnan(grid))
+    if missing.size:
+        i, j = missing[0]
+        raise ValueError(f"Custo ausente para facility_id={facilities[i]}, client_id={clients[j]}")
+    return grid
+
+
+def _allowed_assignments(
+    cost_grid: np.ndarray,
+    facilities: List[str],
+    forced_open: Set[str],
+    candidate_k: int | None,
+) -> np.ndarray:
+    """Máscara ``facility × client`` dos pares que recebem variável de atribuição.
+
+    Com ``candidate_k``, cada cliente só pode ser atendido pelas ``k`` instalações mais
+    baratas para ele ou por uma instalação forçada aberta.
+    """
+    allowed = np.ones(cost_grid.shape, dtype=bool)
+    if candidate_k is None or candidate_k >= len(facilities):
+        return allowed
+    if candidate_k < 1:
+        raise ValueError("candidate_k deve ser >= 1.")
+    allowed[:] = False
+    nearest = np.argsort(cost_grid, axis=0, kind="stable")[:candidate_k]
+    np.put_along_axis(allowed, nearest, True, axis=0)
+    allowed[[i for i, facility in enumerate(facilities) if facility in forced_open]] = True
+    return allowed
+
+
+def _penalize_disallowed(cost_grid: np.ndarray, allowed: np.ndarray, fixed: np.ndarray) -> np.ndarray:
+    """Troca pares sem variável por um custo alto finito para a heurística gulosa."""
+    if allowed.all():
+        return cost_grid
+    penalty = (float(cost_grid.max()) + float(fixed.sum()) + 1.0) * (cost_grid.shape[1] + 1)
+    return np.where(allowed, cost_grid, penalty)
+
+
+def _warm_start_applies(
+    warm_start: SolutionResult,
+    facilities: List[str],
+    clients: List[str],
+    forced_open: Set[str],
+    candidate_set: Set[str],
+    max_new_facilities: int | None,
+    min_total_open_facilities: int | None,
+) -> bool:
+    """Indica se a solução anterior é uma semente viável para o modelo atual."""
+    seed_open = set(warm_start.open_facilities)
+    if not seed_open <= set(facilities) or not forced_open <= seed_open:
+        return False
+    if set(warm_start.allocation) != set(clients) or not set(warm_start.allocation.values()) <= seed_open:
+        return False
+    if max_new_facilities is not None and len(seed_open & candidate_set) > max_new_facilities:
+        return False
+    if min_total_open_facilities is not None and len(seed_open) < int(min_total_open_facilities):
+        return False
+    return True
+
+
+def _greedy_seed(
+    cost_grid: np.ndarray,
+    fixed: np.ndarray,
+    facilities: List[str],
+    clients: List[str],
+    forced_open: Set[str],
+    candidate_set: Set[str],
+    max_new_facilities: int | None,
+    min_total_open_facilities: int | None,
+) -> SolutionResult | None:
+    """Heurística gulosa de abertura (caso não capacitado) usada como MIP start do CBC.
+
+    Parte das instalações forçadas e abre, a cada passo, a que mais reduz o custo total,
+    respeitando ``max_new_facilities`` e completando ``min_total_open_facilities``.
+    """
+    is_open = np.array([facility in forced_open for facility in facilities])
+    is_candidate = np.array([facility in candidate_set for facility in facilities])
+    best = cost_grid[is_open].min(axis=0) if is_open.any() else np.full(len(clients), np.inf)
+    min_open = int(min_total_open_facilities or 0)
+
+    while not is_open.all():
+        allowed = ~is_open
+        if max_new_facilities is not None and (is_open & is_candidate).sum() >= max_new_facilities:
+            allowed &= ~is_candidate
+        if not allowed.any():
+            break
+        totals = fixed + np.minimum(best, cost_grid).sum(axis=1)
+        totals[~allowed] = np.inf
+        choice = int(np.argmin(totals))
+        current = fixed[is_open].sum() + best.sum()
+        if totals[choice] >= current and is_open.sum() >= min_open:
+            break
+        is_open[choice] = True
+        best = np.minimum(best, cost_grid[choice])
+
+    open_idx = np.flatnonzero(is_open)
+    if not open_idx.size:
+        return None
+    assigned = open_idx[np.argmin(cost_grid[open_idx], axis=0)]
+    variable = float(cost_grid[assigned, np.arange(len(clients))].sum())
+    fixed_total = float(fixed[open_idx].sum())
+    return SolutionResult(
+        open_facilities=[facilities[i] for i in open_idx],
+        total_cost=fixed_total + variable,
+        fixed_cost=fixed_total,
+        variable_cost=variable,
+        allocation={client: facilities[i] for client, i in zip(clients, assigned)},
+    )
+
+
+class FacilityLocationModel:
+    """Modelo MILP de localização montado uma vez e re-resolvido após mudanças de custo.
+
+    A estrutura (variáveis, atribuição, vínculo, cardinalidade e capacidade) é criada no
+    construtor; ``update_costs`` e ``update_capacity`` alteram apenas coeficientes da
+    função objetivo e lados direitos, e ``resolve`` chama o CBC reaproveitando a última
+    solução como warm start.
 
     Espera as colunas:
     - ``cost_matrix``: ``facility_id``, ``client_id``, ``unit_cost`` ou ``freight_cost``.
     - ``fixed_costs``: ``facility_id``, ``fixed_cost``.
     """
-    facilities = fixed_costs["facility_id"].astype(str).tolist()
-    clients = sorted(cost_matrix["client_id"].astype(str).unique().tolist())
-
-    cost_column = "unit_cost" if "unit_cost" in cost_matrix.columns else "freight_cost"
-    variable_cost = {
-        (str(row.facility_id), str(row.client_id)): float(getattr(row, cost_column))
-        for row in cost_matrix.dropna(subset=[cost_column]).itertuples(index=False)
-    }
-    fixed_cost = {
-        str(row.facility_id): float(row.fixed_cost)
-        for row in fixed_costs.itertuples(index=False)
-    }
-
-    forced_open = {str(f) for f in (forced_open_facilities or [])}
-    unknown_forced = sorted(forced_open - set(facilities))
-    if unknown_forced:
-        raise ValueError(f"Facilities forçadas ausentes em fixed_costs: {unknown_forced}")
-
-    if candidate_facilities is None:
-        candidate_set = set(facilities) - forced_open
-    else:
-        candidate_set = {str(f) for f in candidate_facilities}
-        unknown_candidates = sorted(candidate_set - set(facilities))
-        if unknown_candidates:
-            raise ValueError(f"Facilities candidatas ausentes em fixed_costs: {unknown_candidates}")
-
-    if "demanda" in cost_matrix.columns:
-        inferred_demand = (
-            cost_matrix[["client_id", "demanda"]]
-            .drop_duplicates(subset=["client_id"])
-            .set_index("client_id")["demanda"]
-            .astype(float)
-            .to_dict()
+
+    def __init__(
+        self,
+        cost_matrix: pd.DataFrame,
+        fixed_costs: pd.DataFrame,
+        max_new_facilities: int | None = None,
+        capacity_by_facility: Dict[str, float] | None = None,
+        demand_by_client: Dict[str, float] | None = None,
+        forced_open_facilities: Iterable[str] | None = None,
+        candidate_facilities: Iterable[str] | None = None,
+        min_total_open_facilities: int | None = None,
+        strong_formulation: bool = False,
+        candidate_k: int | None = None,
+    ) -> None:
+        # Normaliza/valida interseção entre instalações forçadas abertas e candidatas
+        if forced_open_facilities is not None and candidate_facilities is not None:
+            forced_open_facilities = list(forced_open_facilities)
+            candidate_facilities = list(candidate_facilities)
+            forced_open_set = set(forced_open_facilities)
+            candidate_set = set(candidate_facilities)
+            intersection = forced_open_set & candidate_set
+
+            if intersection:
+                # Se o número máximo de novas instalações for menor que a interseção,
+                # o modelo ficaria inviável pela combinação das restrições.
+                if max_new_facilities is not None and len(intersection) > max_new_facilities:
+                    raise ValueError(
+                        "Configuração inválida: existem instalações em comum entre "
+                        "`forced_open_facilities` e `candidate_facilities` cujo número "
+                        "excede `max_new_facilities`, o que tornaria o problema inviável. "
+                        f"Instalações em conflito: {sorted(intersection)}"
+                    )
+
+                # Remove as instalações já forçadas abertas do conjunto de candidatas
+                candidate_facilities = [f for f in candidate_facilities if f not in forced_open_set]
+
+        facilities = fixed_costs["facility_id"].astype(str).tolist()
+        clients = sorted(cost_matrix["client_id"].astype(str).unique().tolist())
+        self.facilities = facilities
+        self.clients = clients
+
+        self.cost_grid = _cost_grid(cost_matrix, _cost_column(cost_matrix), facilities, clients)
+        self.fixed = self._fixed_array(fixed_costs)
+
+        forced_open = {str(f) for f in (forced_open_facilities or [])}
+        unknown_forced = sorted(forced_open - set(facilities))
+        if unknown_forced:
+            raise ValueError(f"Facilities forçadas ausentes em fixed_costs: {unknown_forced}")
+
+        if candidate_facilities is None:
+            candidate_set = set(facilities) - forced_open
+        else:
+            candidate_set = {str(f) for f in candidate_facilities}
+            unknown_candidates = sorted(candidate_set - set(facilities))
+            if unknown_candidates:
+                raise ValueError(f"Facilities candidatas ausentes em fixed_costs: {unknown_candidates}")
+        self.forced_open = forced_open
+        self.candidate_set = candidate_set
+        self.max_new_facilities = max_new_facilities
+        self.min_total_open_facilities = min_total_open_facilities
+        self.capacitated = capacity_by_facility is not None
+
+        demand = pd.Series(1.0, index=clients)
+        if "demanda" in cost_matrix.columns:
+            demand.update(
+                cost_matrix[["client_id", "demanda"]]
+                .drop_duplicates(subset=["client_id"])
+                .assign(client_id=lambda df: df["client_id"].astype(str))
+                .set_index("client_id")["demanda"]
+                .astype(float)
+            )
+        if demand_by_client:
+            demand.update(pd.Series(demand_by_client, dtype=float).rename(index=str))
+        self.client_demand = demand.to_numpy()
+
+        model = pulp.LpProblem("facility_location", pulp.LpMinimize)
+
+        y = pulp.LpVariable.dicts("y", facilities, 0, 1, pulp.LpBinary)
+        # Sem capacidade, a localização não capacitada tem a propriedade de integralidade
+        # em ``x``: fixado ``y``, cada cliente vai inteiro para a instalação aberta mais
+        # barata. Só ``y`` precisa ser binária; com capacidade ``x`` volta a ser binária.
+        assignment_category = pulp.LpBinary if self.capacitated else pulp.LpContinuous
+        self.allowed = _allowed_assignments(self.cost_grid, facilities, forced_open, candidate_k)
+        x: Dict[str, Dict[str, pulp.LpVariable]] = {
+            client: {
+                facilities[i]: pulp.LpVariable(f"x_{client}_{facilities[i]}", 0, 1, assignment_category)
+                for i in np.flatnonzero(self.allowed[:, j])
+            }
+            for j, client in enumerate(clients)
+        }
+        self.model, self.x, self.y = model, x, y
+
+        self._set_objective()
+
+        model.extend(
+            pulp.LpAffineExpression([(var, 1) for var in x[client].values()]) == 1
+            for client in clients
         )
-    else:
-        inferred_demand = {}
+        if strong_formulation:
+            model.extend(
+                x_cf <= y[facility]
+                for client in clients
+                for facility, x_cf in x[client].items()
+            )
+        else:
+            # Formulação agregada: |F| linhas em vez de |C|·|F|, com limite de LP mais fraco.
+            model.extend(
+                pulp.LpAffineExpression([(x[client][facility], 1) for client in clients if facility in x[client]])
+                <= len(clients) * y[facility]
+                for facility in facilities
+            )
 
-    client_demand = {client: float(inferred_demand.get(client, 1.0)) for client in clients}
-    if demand_by_client is not None:
-        client_demand.update({str(k): float(v) for k, v in demand_by_client.items()})
+        for facility in forced_open:
+            model += y[facility] == 1
 
-    model = pulp.LpProblem("facility_location", pulp.LpMinimize)
+        self.strong_formulation = strong_formulation
+        self._capacity_rows: Dict[str, pulp.LpConstraint] = {}
+        if capacity_by_facility is not None:
+            for facility in facilities:
+                row = (
+                    pulp.LpAffineExpression(
+                        [
+                            (x[client][facility], demand_j)
+                            for client, demand_j in zip(clients, self.client_demand.tolist())
+                            if facility in x[client]
+                        ]
+                    )
+                    <= float(capacity_by_facility[facility])
+                )
+                model += row
+                self._capacity_rows[facility] = row
 
-    y = pulp.LpVariable.dicts("y", facilities, 0, 1, pulp.LpBinary)
-    x = pulp.LpVariable.dicts("x", (clients, facilities), 0, 1, pulp.LpBinary)
+        if max_new_facilities is not None:
+            model += pulp.lpSum(y[facility] for facility in candidate_set) <= max_new_facilities
 
-    for client in clients:
-        for facility in facilities:
-            if (facility, client) not in variable_cost:
-                raise ValueError(f"Custo ausente para facility_id={facility}, client_id={client}")
+        if min_total_open_facilities is not None:
+            model += pulp.lpSum(y[facility] for facility in facilities) >= int(min_total_open_facilities)
 
-    model += (
-        pulp.lpSum(variable_cost[(facility, client)] * x[client][facility] for client in clients for facility in facilities)
-        + pulp.lpSum(fixed_cost[facility] * y[facility] for facility in facilities)
-    )
+        self.last_solution: SolutionResult | None = None
 
-    for client in clients:
-        model += pulp.lpSum(x[client][facility] for facility in facilities) == 1
+    def update_costs(
+        self,
+        cost_matrix: pd.DataFrame | None = None,
+        fixed_costs: pd.DataFrame | None = None,
+    ) -> None:
+        """Troca custos variáveis e/ou fixos mantendo as mesmas instalações e clientes."""
+        if cost_matrix is not None:
+            clients = set(cost_matrix["client_id"].astype(str).unique())
+            if clients != set(self.clients):
+                raise ValueError("update_costs exige o mesmo conjunto de clientes do modelo.")
+            self.cost_grid = _cost_grid(cost_matrix, _cost_column(cost_matrix), self.facilities, self.clients)
+        if fixed_costs is not None:
+            self.fixed = self._fixed_array(fixed_costs)
+        self._set_objective()
 
-    for client in clients:
-        for facility in facilities:
-            model += x[client][facility] <= y[facility]
+    def update_capacity(self, capacity_by_facility: Dict[str, float]) -> None:
+        """Altera o lado direito das restrições de capacidade já existentes."""
+        if not self.capacitated:
+            raise ValueError("Modelo montado sem capacidade; recrie-o com capacity_by_facility.")
+        for facility, row in self._capacity_rows.items():
+            row.changeRHS(float(capacity_by_facility[facility]))
 
-    for facility in forced_open:
-        model += y[facility] == 1
+    def resolve(
+        self,
+        warm_start: SolutionResult | None = None,
+        gap_rel: float | None = DEFAULT_GAP_REL,
+        time_limit_seconds: float | None = DEFAULT_TIME_LIMIT_SECONDS,
+        threads: int = DEFAULT_SOLVER_THREADS,
+    ) -> SolutionResult:
+        """Resolve o modelo atual, usando como MIP start a solução informada ou a última obtida.
 
-    if capacity_by_facility is not None:
-        for facility in facilities:
-            capacity = float(capacity_by_facility[facility])
-            model += (
-                pulp.lpSum(client_demand[client] * x[client][facility] for client in clients)
-                <= capacity
+        Na formulação forte, com scipy disponível, resolve antes a relaxação linear (HiGHS,
+        matrizes esparsas); se ela já for inteira, é ótima para o MILP e o CBC não é chamado.
+        Na formulação agregada a relaxação quase nunca é inteira, então o atalho é omitido.
+
+        O CBC roda com presolve, ``threads`` (padrão: ``DEFAULT_SOLVER_THREADS``), gap relativo
+        ``gap_rel`` e limite de tempo ``time_limit_seconds``; com gap ou limite definidos,
+        uma solução inteira viável (não provada ótima) também é aceita.
+        """
+        relaxed = self._solve_lp_relaxation() if self.strong_formulation else None
+        if relaxed is not None:
+            self.last_solution = relaxed
+            logger.info("Relaxação linear inteira: %d instalações abertas sem CBC", len(relaxed.open_facilities))
+            return relaxed
+
+        facilities, clients, x, y = self.facilities, self.clients, self.x, self.y
+        warm_start = warm_start or self.last_solution
+        if warm_start is None and not self.capacitated and clients:
+            warm_start = _greedy_seed(
+                _penalize_disallowed(self.cost_grid, self.allowed, self.fixed),
+                self.fixed,
+                facilities,
+                clients,
+                self.forced_open,
+                self.candidate_set,
+                self.max_new_facilities,
+                self.min_total_open_facilities,
             )
 
-    if max_new_facilities is not None:
-        model += pulp.lpSum(y[facility] for facility in candidate_set) <= max_new_facilities
+        use_warm_start = warm_start is not None and _warm_start_applies(
+            warm_start,
+            facilities,
+            clients,
+            self.forced_open,
+            self.candidate_set,
+            self.max_new_facilities,
+            self.min_total_open_facilities,
+        ) and all(warm_start.allocation[client] in x[client] for client in clients)
+        if use_warm_start:
+            seed_open = set(warm_start.open_facilities)
+            for facility in facilities:
+                y[facility].setInitialValue(1 if facility in seed_open else 0)
+            for client in clients:
+                for facility, x_cf in x[client].items():
+                    x_cf.setInitialValue(1 if warm_start.allocation[client] == facility else 0)
+        elif warm_start is not None:
+            logger.info("Warm start ignorado: solução anterior inviável para o modelo atual")
 
-    if min_total_open_facilities is not None:
-        model += pulp.lpSum(y[facility] for facility in facilities) >= int(min_total_open_facilities)
+        solver = pulp.PULP_CBC_CMD(
+            msg=False,
+            warmStart=use_warm_start,
+            threads=threads,
+            gapRel=gap_rel,
+            timeLimit=time_limit_seconds,
+            presolve=True,
+        )
+        status = self.model.solve(solver)
+        accepted = {pulp.LpSolutionOptimal}
+        if gap_rel is not None or time_limit_seconds is not None:
+            accepted.add(pulp.LpSolutionIntegerFeasible)
+        if pulp.LpStatus[status] != "Optimal" or self.model.sol_status not in accepted:
+            raise RuntimeError(f"Solver não encontrou solução ótima. Status: {pulp.LpStatus[status]}")
+        if self.model.sol_status == pulp.LpSolutionIntegerFeasible:
+            logger.warning("CBC parou por gap/limite de tempo: solução viável, sem prova de otimalidade")
 
-    status = model.solve(pulp.PULP_CBC_CMD(msg=False))
-    if pulp.LpStatus[status] != "Optimal":
-        raise RuntimeError(f"Solver não encontrou solução ótima. Status: {pulp.LpStatus[status]}")
+        open_idx = [i for i, facility in enumerate(facilities) if pulp.value(y[facility]) > 0.5]
+        # Empates de custo podem dividir um cliente contínuo entre instalações abertas;
+        # a maior fração decide a atribuição (equivale a ``> 0.5`` quando integral).
+        facility_index = {facility: i for i, facility in enumerate(facilities)}
+        assigned = [
+            facility_index[max(x[client], key=lambda facility: pulp.value(x[client][facility]) or 0.0)]
+            for client in clients
+        ]
 
-    open_facilities = [facility for facility in facilities if pulp.value(y[facility]) > 0.5]
-    allocation = {
-        client: facility
-        for client in clients
-        for facility in facilities
-        if pulp.value(x[client][facility]) > 0.5
-    }
+        result = SolutionResult(
+            open_facilities=[facilities[i] for i in open_idx],
+            total_cost=float(pulp.value(self.model.objective)),
+            fixed_cost=float(self.fixed[open_idx].sum()),
+            variable_cost=float(self.cost_grid[assigned, np.arange(len(clients))].sum()),
+            allocation={client: facilities[i] for client, i in zip(clients, assigned)},
+        )
+        self.last_solution = result
+        logger.info("Otimização concluída com %d instalações abertas", len(result.open_facilities))
+        return result
 
-    total_cost = float(pulp.value(model.objective))
-    total_fixed_cost = float(sum(fixed_cost[facility] for facility in open_facilities))
-    total_variable_cost = float(
-        sum(variable_cost[(facility, client)] for client, facility in allocation.items())
-    )
+    def _solve_lp_relaxation(self, tolerance: float = 1e-6) -> SolutionResult | None:
+        """Resolve a relaxação linear; retorna a solução apenas se ela já for inteira."""
+        if linprog is None or not self.clients:
+            return None
 
-    logger.info("Otimização concluída com %d instalações abertas", len(open_facilities))
-    return SolutionResult(
-        open_facilities=open_facilities,
-        total_cost=total_cost,
-        fixed_cost=total_fixed_cost,
-        variable_cost=total_variable_cost,
-        allocation=allocation,
+        n_facilities, n_clients = len(self.facilities), len(self.clients)
+        # Variáveis: y (uma por instalação) seguidas dos x existentes, ordem client-major.
+        x_client, x_facility = np.nonzero(self.allowed.T)
+        n_x = len(x_client)
+        x_cols = n_facilities + np.arange(n_x)
+        objective = np.concatenate([self.fixed, self.cost_grid[x_facility, x_client]])
+
+        a_eq = sparse.csr_matrix(
+            (np.ones(n_x), (x_client, x_cols)), shape=(n_clients, n_facilities + n_x)
+        )
+
+        rows, cols, data, b_ub = [], [], [], []
+        n_rows = 0
+        if self.strong_formulation:
+            rows += [n_rows + np.arange(n_x)] * 2
+            cols += [x_cols, x_facility]
+            data += [np.ones(n_x), -np.ones(n_x)]
+            b_ub.append(np.zeros(n_x))
+            n_rows += n_x
+        else:
+            rows += [n_rows + x_facility, n_rows + np.arange(n_facilities)]
+            cols += [x_cols, np.arange(n_facilities)]
+            data += [np.ones(n_x), np.full(n_facilities, -float(n_clients))]
+            b_ub.append(np.zeros(n_facilities))
+            n_rows += n_facilities
+        if self.capacitated:
+            rows.append(n_rows + x_facility)
+            cols.append(x_cols)
+            data.append(self.client_demand[x_client])
+            b_ub.append(np.array([-self._capacity_rows[facility].constant for facility in self.facilities]))
+            n_rows += n_facilities
+        if self.max_new_facilities is not None:
+            candidates = np.array([i for i, f in enumerate(self.facilities) if f in self.candidate_set], dtype=int)
+            rows.append(np.full(len(candidates), n_rows))
+            cols.append(candidates)
+            data.append(np.ones(len(candidates)))
+            b_ub.append(np.array([float(self.max_new_facilities)]))
+            n_rows += 1
+        if self.min_total_open_facilities is not None:
+            rows.append(np.full(n_facilities, n_rows))
+            cols.append(np.arange(n_facilities))
+            data.append(-np.ones(n_facilities))
+            b_ub.append(np.array([-float(self.min_total_open_facilities)]))
+            n_rows += 1
+        a_ub = sparse.coo_matrix(
+            (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n_rows, n_facilities + n_x),
+        ).tocsr()
+
+        bounds = [(1.0 if f in self.forced_open else 0.0, 1.0) for f in self.facilities] + [(0.0, 1.0)] * n_x
+        lp = linprog(
+            objective,
+            A_ub=a_ub,
+            b_ub=np.concatenate(b_ub),
+            A_eq=a_eq,
+            b_eq=np.ones(n_clients),
+            bounds=bounds,
+            method="highs",
+        )
+        if lp.status != 0 or np.abs(lp.x - np.round(lp.x)).max() > tolerance:
+            return None
+
+        values = np.round(lp.x)
+        open_idx = np.flatnonzero(values[:n_facilities] > 0.5)
+        chosen = values[n_facilities:] > 0.5
+        assigned = np.empty(n_clients, dtype=int)
+        assigned[x_client[chosen]] = x_facility[chosen]
+        fixed_total = float(self.fixed[open_idx].sum())
+        variable_total = float(self.cost_grid[assigned, np.arange(n_clients)].sum())
+        return SolutionResult(
+            open_facilities=[self.facilities[i] for i in open_idx],
+            total_cost=fixed_total + variable_total,
+            fixed_cost=fixed_total,
+            variable_cost=variable_total,
+            allocation={client: self.facilities[i] for client, i in zip(self.clients, assigned)},
+        )
+
+    def _fixed_array(self, fixed_costs: pd.DataFrame) -> np.ndarray:
+        fixed = (
+            fixed_costs.assign(facility_id=fixed_costs["facility_id"].astype(str))
+            .drop_duplicates(subset=["facility_id"], keep="last")
+            .set_index("facility_id")["fixed_cost"]
+            .astype(float)
+            .reindex(self.facilities)
+        )
+        missing = fixed.index[fixed.isna()].tolist()
+        if missing:
+            raise ValueError(f"Custo fixo ausente para facilities: {missing}")
+        return fixed.to_numpy()
+
+    def _set_objective(self) -> None:
+        # Expressão montada diretamente de pares (variável, coeficiente): evita o
+        # custo de ``lpSum`` sobre geradores com |C|·|F| termos intermediários.
+        x_flat = [x_cf for client in self.clients for x_cf in self.x[client].values()]
+        self.model.setObjective(
+            pulp.LpAffineExpression(
+                list(zip(x_flat, self.cost_grid.T[self.allowed.T].tolist()))
+                + [(self.y[facility], cost) for facility, cost in zip(self.facilities, self.fixed.tolist())]
+            )
+        )
+
+
+def solve_facility_location(
+    cost_matrix: pd.DataFrame,
+    fixed_costs: pd.DataFrame,
+    max_new_facilities: int | None = None,
+    capacity_by_facility: Dict[str, float] | None = None,
+    demand_by_client: Dict[str, float] | None = None,
+    forced_open_facilities: Iterable[str] | None = None,
+    candidate_facilities: Iterable[str] | None = None,
+    min_total_open_facilities: int | None = None,
+    strong_formulation: bool = False,
+    warm_start: SolutionResult | None = None,
+    gap_rel: float | None = DEFAULT_GAP_REL,
+    time_limit_seconds: float | None = DEFAULT_TIME_LIMIT_SECONDS,
+    threads: int = DEFAULT_SOLVER_THREADS,
+    candidate_k: int | None = None,
+) -> SolutionResult:
+    """Resolve o problema de localização de instalações com atribuição única por demanda.
+
+    Por padrão o vínculo entre atribuição e abertura usa uma restrição agregada por
+    instalação (``sum_c x[c,f] <= |C|·y[f]``); ``strong_formulation=True`` volta às
+    restrições par a par ``x[c,f] <= y[f]``, de limite mais apertado no branch-and-bound.
+
+    ``warm_start`` reaproveita a solução de uma execução anterior como MIP start do CBC,
+    desde que ela continue viável para as instalações forçadas/candidatas atuais. Para
+    varreduras que só mudam custos ou capacidades, use :class:`FacilityLocationModel`.
+
+    ``candidate_k`` restringe cada cliente às ``k`` instalações mais baratas (além das
+    forçadas abertas): |C|·k variáveis de atribuição em vez de |C|·|F|, ao custo de
+    deixar de garantir o ótimo global quando a melhor opção de um cliente fica de fora.
+
+    ``gap_rel``, ``time_limit_seconds`` e ``threads`` configuram o CBC; ver
+    :meth:`FacilityLocationModel.resolve`.
+
+    Espera as colunas:
+    - ``cost_matrix``: ``facility_id``, ``client_id``, ``unit_cost`` ou ``freight_cost``.
+    - ``fixed_costs``: ``facility_id``, ``fixed_cost``.
+    """
+    model = FacilityLocationModel(
+        cost_matrix,
+        fixed_costs,
+        max_new_facilities=max_new_facilities,
+        capacity_by_facility=capacity_by_facility,
+        demand_by_client=demand_by_client,
+        forced_open_facilities=forced_open_facilities,
+        candidate_facilities=candidate_facilities,
+        min_total_open_facilities=min_total_open_facilities,
+        strong_formulation=strong_formulation,
+        candidate_k=candidate_k,
+    )
+    return model.resolve(
+        warm_start=warm_start,
+        gap_rel=gap_rel,
+        time_limit_seconds=time_limit_seconds,
+        threads=threads,
     )
@@ -5,6 +5,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Iterable
 
+import numpy as np
 import pandas as pd
 
 from .logging_config import configure_logging
@@ -32,28 +33,63 @@ class FinancialIndicators:
     roi: float
 
 
+_ASSIGNMENT_KEYS = ["facility_id", "client_id"]
+
+
+def _assignment_keys_compatible(assignments: pd.DataFrame, cost_matrix: pd.DataFrame) -> bool:
+    for col in _ASSIGNMENT_KEYS:
+        left, right = assignments[col], cost_matrix[col]
+        if left.dtype != right.dtype and not (pd.api.types.is_string_dtype(left) and pd.api.types.is_string_dtype(right)):
+            return False
+    return True
+
+
 def compute_financials(assignments: pd.DataFrame, cost_matrix: pd.DataFrame, unit_revenue: float, fixed_cost: float) -> FinancialSummary:
     """Calcula receita, custos e margem."""
     cost_column = "unit_cost" if "unit_cost" in cost_matrix.columns else "freight_cost"
-    merged = assignments.merge(cost_matrix[["facility_id", "client_id", cost_column]], on=["facility_id", "client_id"])
-    variable_cost = float(merged[cost_column].sum())
-    revenue = float(len(merged) * unit_revenue)
+    cost_lookup = cost_matrix.set_index(_ASSIGNMENT_KEYS)[cost_column]
+    if cost_lookup.index.is_unique and _assignment_keys_compatible(assignments, cost_matrix):
+        # Busca direta por (facility_id, client_id): sem ordenar/juntar os dois frames.
+        positions = cost_lookup.index.get_indexer(pd.MultiIndex.from_frame(assignments[_ASSIGNMENT_KEYS]))
+        matched_costs = cost_lookup.to_numpy(dtype=float)[positions[positions >= 0]]
+    else:
+        # Pares repetidos ou chaves de tipos diferentes: o merge repete as linhas ou falha explicitamente.
+        merged = assignments.merge(cost_matrix[[*_ASSIGNMENT_KEYS, cost_column]], on=_ASSIGNMENT_KEYS)
+        matched_costs = merged[cost_column].to_numpy(dtype=float)
+    variable_cost = float(np.nansum(matched_costs))
+    revenue = float(len(matched_costs) * unit_revenue)
     margin = revenue - variable_cost - fixed_cost
     summary = FinancialSummary(revenue=revenue, variable_cost=variable_cost, fixed_cost=fixed_cost, margin=margin)
     logger.info("Resumo financeiro calculado: %s", summary)
     return summary
 
 
-def _normalize_cashflows(annual_savings: float | Iterable[float], horizon_years: int) -> list[float]:
+def _normalize_cashflows(annual_savings: float | Iterable[float], horizon_years: int) -> np.ndarray:
     if isinstance(annual_savings, (int, float)):
-        return [float(annual_savings)] * horizon_years
+        return np.full(horizon_years, float(annual_savings))
 
-    cashflows = [float(value) for value in annual_savings]
+    cashflows = np.asarray(list(annual_savings), dtype=float)
     if len(cashflows) != horizon_years:
         raise ValueError("Quantidade de fluxos anuais deve ser igual ao horizonte de anos.")
     return cashflows
 
 
+def _discount_factors(horizon_years: int, discount_rate: float) -> np.ndarray:
+    return (1.0 + discount_rate) ** -np.arange(1, horizon_years + 1, dtype=float)
+
+
+def _payback(initial_investment: float, flows: np.ndarray) -> float | None:
+    """Ano fracionário em que o acumulado cobre o investimento, num ano de fluxo positivo."""
+    cumulative = np.cumsum(flows)
+    # Fluxos negativos tornam o acumulado não monotônico, por isso máscara em vez de searchsorted.
+    hits = np.flatnonzero((cumulative >= initial_investment) & (flows > 0))
+    if not hits.size:
+        return None
+    idx = int(hits[0])
+    previous = float(cumulative[idx - 1]) if idx else 0.0
+    return idx + (initial_investment - previous) / float(flows[idx])
+
+
 def calculate_npv(
     initial_investment: float,
     annual_savings: float | Iterable[float],
@@ -62,24 +98,14 @@ def calculate_npv(
 ) -> float:
     """Calcula VPL com fluxo de economia anual versus baseline."""
     cashflows = _normalize_cashflows(annual_savings, horizon_years)
-    discounted_sum = sum(cf / ((1 + discount_rate) ** year) for year, cf in enumerate(cashflows, start=1))
+    discounted_sum = float(cashflows @ _discount_factors(horizon_years, discount_rate))
     return discounted_sum - float(initial_investment)
 
 
 def calculate_payback_simple(initial_investment: float, annual_savings: float | Iterable[float], horizon_years: int) -> float | None:
     """Calcula payback simples (anos), retornando None se não recuperar no horizonte."""
     cashflows = _normalize_cashflows(annual_savings, horizon_years)
-    cumulative = 0.0
-    for year, flow in enumerate(cashflows, start=1):
-        if flow <= 0:
-            cumulative += flow
-            continue
-        previous = cumulative
-        cumulative += flow
-        if cumulative >= initial_investment:
-            residual = initial_investment - previous
-            return (year - 1) + (residual / flow)
-    return None
+    return _payback(initial_investment, cashflows)
 
 
 def calculate_payback_discounted(
@@ -90,27 +116,18 @@ def calculate_payback_discounted(
 ) -> float | None:
     """Calcula payback descontado (anos), retornando None se não recuperar no horizonte."""
     cashflows = _normalize_cashflows(annual_savings, horizon_years)
-    cumulative = 0.0
-    for year, flow in enumerate(cashflows, start=1):
-        discounted = flow / ((1 + discount_rate) ** year)
-        if discounted <= 0:
-            cumulative += discounted
-            continue
-        previous = cumulative
-        cumulative += discounted
-        if cumulative >= initial_investment:
-            residual = initial_investment - previous
-            return (year - 1) + (residual / discounted)
-    return None
+    return _payback(initial_investment, cashflows * _discount_factors(horizon_years, discount_rate))
 
 
 def calculate_roi(initial_investment: float, annual_savings: float | Iterable[float], horizon_years: int) -> float:
     """Calcula ROI acumulado no horizonte usando economia total versus investimento."""
-    cashflows = _normalize_cashflows(annual_savings, horizon_years)
-    total_savings = sum(cashflows)
+    return _roi(initial_investment, _normalize_cashflows(annual_savings, horizon_years))
+
+
+def _roi(initial_investment: float, cashflows: np.ndarray) -> float:
     if initial_investment == 0:
         raise ValueError("Investimento inicial não pode ser zero para cálculo de ROI.")
-    return (total_savings - initial_investment) / initial_investment
+    return (float(cashflows.sum()) - initial_investment) / initial_investment
 
 
 def calculate_financial_indicators(
@@ -119,12 +136,17 @@ def calculate_financial_indicators(
     horizon_years: int,
     discount_rate: float,
 ) -> FinancialIndicators:
-    """Consolida VPL, paybacks e ROI para um cenário de abertura de CDs."""
+    """Consolida VPL, paybacks e ROI para um cenário de abertura de CDs.
+
+    Normaliza os fluxos e calcula o vetor de desconto uma única vez para os quatro indicadores.
+    """
+    cashflows = _normalize_cashflows(annual_savings, horizon_years)
+    discounted = cashflows * _discount_factors(horizon_years, discount_rate)
     indicators = FinancialIndicators(
-        npv=calculate_npv(initial_investment, annual_savings, horizon_years, discount_rate),
-        payback_simple=calculate_payback_simple(initial_investment, annual_savings, horizon_years),
-        payback_discounted=calculate_payback_discounted(initial_investment, annual_savings, horizon_years, discount_rate),
-        roi=calculate_roi(initial_investment, annual_savings, horizon_years),
+        npv=float(discounted.sum()) - float(initial_investment),
+        payback_simple=_payback(initial_investment, cashflows),
+        payback_discounted=_payback(initial_investment, discounted),
+        roi=_roi(initial_investment, cashflows),
     )
     logger.info("Indicadores financeiros calculados: %s", indicators)
     return indicators
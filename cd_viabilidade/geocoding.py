@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+import asyncio
 import csv
 import json
+import sqlite3
+import threading
 import time
+import warnings
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterable, Iterator
 
 try:
     from geopy.exc import GeocoderTimedOut
@@ -44,13 +48,120 @@ class GeocodeResult:
     source: str = "api"
 
 
+CacheEntry = dict[str, str | float | bool | None]
+RESULT_MEMO_SIZE = 100_000
+LEGACY_CACHE_SUFFIXES = (".json", ".csv")
+
+
+def _read_legacy_cache(path: Path) -> dict[str, CacheEntry]:
+    """Lê um cache legado em JSON ou CSV (arquivo ausente resulta em cache vazio)."""
+    if not path.exists():
+        return {}
+
+    if path.suffix.lower() == ".json":
+        with path.open("r", encoding="utf-8") as fp:
+            data = json.load(fp)
+        return data if isinstance(data, dict) else {}
+
+    cache: dict[str, CacheEntry] = {}
+    with path.open("r", encoding="utf-8", newline="") as fp:
+        reader = csv.DictReader(fp)
+        for row in reader:
+            if not row.get("cache_key"):
+                continue
+            cache[row["cache_key"]] = {
+                "cidade": row.get("cidade", ""),
+                "uf": row.get("uf", ""),
+                "lat": float(row["lat"]) if row.get("lat") else None,
+                "lon": float(row["lon"]) if row.get("lon") else None,
+                "found": row.get("found") == "True",
+                "warning": row.get("warning") or None,
+            }
+    return cache
+
+
+class SqliteGeocodeCache:
+    """Cache de geocodificação em SQLite (WAL) com inserção incremental por chave."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode("
+            "key TEXT PRIMARY KEY, cidade TEXT, uf TEXT, lat REAL, lon REAL, found INT, warning TEXT)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> CacheEntry | None:
+        row = self._conn.execute(
+            "SELECT cidade, uf, lat, lon, found, warning FROM geocode WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        cidade, uf, lat, lon, found, warning = row
+        return {"cidade": cidade, "uf": uf, "lat": lat, "lon": lon, "found": bool(found), "warning": warning}
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.get(key) is not None
+
+    def __getitem__(self, key: str) -> CacheEntry:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: CacheEntry) -> None:
+        self.update({key: value})
+
+    def update(self, entries: dict[str, CacheEntry]) -> None:
+        """Grava várias entradas em uma única transação."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO geocode(key, cidade, uf, lat, lon, found, warning) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (key, value["cidade"], value["uf"], value["lat"], value["lon"], int(bool(value["found"])), value["warning"])
+                for key, value in entries.items()
+            ],
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0])
+
+    def __iter__(self) -> Iterator[str]:
+        return (row[0] for row in self._conn.execute("SELECT key FROM geocode").fetchall())
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class _MinIntervalLimiter:
+    """Espaça o início de chamadas, vindas de qualquer thread, em pelo menos ``interval`` segundos."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self) -> None:
+        with self._lock:
+            wait_seconds = self._next_slot - time.monotonic()
+            if wait_seconds > 0:
+                time.sleep(wait_seconds)
+            self._next_slot = time.monotonic() + self.interval
+
+
 class GeocodingClient:
-    """Cliente de geocodificação com cache local e retries para timeout."""
+    """Cliente de geocodificação com cache local e retries para timeout.
+
+    Com cache SQLite, feche o cliente com :meth:`close` ou use-o como gerenciador de contexto.
+    """
 
     def __init__(
         self,
         user_agent: str = "cd-viabilidade",
-        cache_path: str | Path = "data/geocode_cache.json",
+        cache_path: str | Path = "data/geocode_cache.sqlite",
         timeout: int = 10,
         max_retries: int = 3,
         backoff_seconds: float = 1.0,
@@ -69,19 +180,90 @@ class GeocodingClient:
         else:
             raise RuntimeError("geopy não está instalado e nenhum geocoder foi injetado")
         self._cache = self._load_cache()
+        self._cached_results: dict[str, GeocodeResult] = {}
+
+    def __enter__(self) -> GeocodingClient:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Fecha a conexão do cache SQLite (caches JSON/CSV não mantêm recurso aberto)."""
+        if isinstance(self._cache, SqliteGeocodeCache):
+            self._cache.close()
 
     def geocode_city_uf(self, cidade: str, uf: str) -> GeocodeResult:
         """Geocodifica no formato `cidade + uf + Brasil` com fallback resiliente."""
         cache_key = self._cache_key(cidade, uf)
         query = f"{cidade}, {uf}, Brasil"
 
-        if cache_key in self._cache:
-            cached_result = self._dict_to_result(self._cache[cache_key], source="cache")
+        cached_result = self._cached_result(cache_key)
+        if cached_result is not None:
             logger.info("Cache hit para '%s': %s", query, cached_result)
             return cached_result
 
+        result = self._geocode_remote(cidade, uf)
+        self._cache[cache_key] = self._result_to_dict(result)
+        self._save_cache()
+        return result
+
+    async def geocode_many(
+        self,
+        pairs: Iterable[tuple[str, str]],
+        max_concurrency: int = 1,
+        min_interval_seconds: float = 1.0,
+    ) -> list[GeocodeResult]:
+        """Geocodifica vários pares cidade/UF de forma concorrente, na ordem recebida.
+
+        Pares repetidos e acertos de cache não geram requisição. As consultas ao geocoder
+        rodam em threads limitadas por ``max_concurrency``; toda tentativa, inclusive os
+        retries por timeout, tem início espaçado por ``min_interval_seconds`` (política de
+        1 req/s do Nominatim). Os novos resultados são gravados no cache em um único lote ao final.
+        """
+        pairs = list(pairs)
+        resolved: dict[str, GeocodeResult] = {}
+        pending: dict[str, tuple[str, str]] = {}
+        for cidade, uf in pairs:
+            cache_key = self._cache_key(cidade, uf)
+            if cache_key in resolved or cache_key in pending:
+                continue
+            cached_result = self._cached_result(cache_key)
+            if cached_result is not None:
+                resolved[cache_key] = cached_result
+            else:
+                pending[cache_key] = (cidade, uf)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limiter = _MinIntervalLimiter(min_interval_seconds)
+
+        async def _geocode_one(cidade: str, uf: str) -> GeocodeResult:
+            async with semaphore:
+                return await asyncio.to_thread(self._geocode_remote, cidade, uf, limiter.wait)
+
+        fetched = await asyncio.gather(*(_geocode_one(cidade, uf) for cidade, uf in pending.values()))
+        new_entries = {cache_key: self._result_to_dict(result) for cache_key, result in zip(pending, fetched)}
+        if new_entries:
+            self._cache.update(new_entries)
+            self._save_cache()
+        resolved.update(zip(pending, fetched))
+        return [resolved[self._cache_key(cidade, uf)] for cidade, uf in pairs]
+
+    def _geocode_remote(
+        self,
+        cidade: str,
+        uf: str,
+        before_attempt: Callable[[], None] | None = None,
+    ) -> GeocodeResult:
+        """Consulta o geocoder com retries e backoff, sem tocar no cache.
+
+        ``before_attempt`` é chamado antes de cada tentativa (ex: limitador de taxa).
+        """
+        query = f"{cidade}, {uf}, Brasil"
         for attempt in range(1, self.max_retries + 1):
             try:
+                if before_attempt is not None:
+                    before_attempt()
                 location = self.geocoder.geocode(query)
                 if location is None:
                     warning = (
@@ -106,9 +288,6 @@ class GeocodingClient:
                         found=True,
                     )
                     logger.info("Geocodificação bem sucedida para '%s': %s", query, result)
-
-                self._cache[cache_key] = self._result_to_dict(result)
-                self._save_cache()
                 return result
             except GeocoderTimedOut:
                 logger.warning(
@@ -135,42 +314,59 @@ class GeocodingClient:
             warning=warning,
         )
         logger.error(warning)
-        self._cache[cache_key] = self._result_to_dict(result)
-        self._save_cache()
+        return result
+
+    def _cached_result(self, cache_key: str) -> GeocodeResult | None:
+        """Acerto de cache já convertido, memorizado em processo para endereços repetidos."""
+        result = self._cached_results.get(cache_key)
+        if result is not None:
+            return result
+        cached = self._cache.get(cache_key)
+        if cached is None:
+            return None
+        if len(self._cached_results) >= RESULT_MEMO_SIZE:
+            self._cached_results.pop(next(iter(self._cached_results)))
+        result = self._dict_to_result(cached, source="cache")
+        self._cached_results[cache_key] = result
         return result
 
     def _cache_key(self, cidade: str, uf: str) -> str:
         return f"{cidade.strip().lower()}|{uf.strip().lower()}"
 
-    def _load_cache(self) -> dict[str, dict[str, str | float | bool | None]]:
-        if not self.cache_path.exists():
-            return {}
+    def _load_cache(self) -> dict[str, CacheEntry] | SqliteGeocodeCache:
+        suffix = self.cache_path.suffix.lower()
+        if suffix == ".sqlite":
+            cache = SqliteGeocodeCache(self.cache_path)
+            if not len(cache):
+                self._migrate_legacy_cache(cache)
+            return cache
 
-        if self.cache_path.suffix.lower() == ".json":
-            with self.cache_path.open("r", encoding="utf-8") as fp:
-                data = json.load(fp)
-            return data if isinstance(data, dict) else {}
+        if suffix not in LEGACY_CACHE_SUFFIXES:
+            raise ValueError("cache_path deve usar extensão .sqlite, .json ou .csv")
 
-        if self.cache_path.suffix.lower() == ".csv":
-            cache: dict[str, dict[str, str | float | bool | None]] = {}
-            with self.cache_path.open("r", encoding="utf-8", newline="") as fp:
-                reader = csv.DictReader(fp)
-                for row in reader:
-                    if not row.get("cache_key"):
-                        continue
-                    cache[row["cache_key"]] = {
-                        "cidade": row.get("cidade", ""),
-                        "uf": row.get("uf", ""),
-                        "lat": float(row["lat"]) if row.get("lat") else None,
-                        "lon": float(row["lon"]) if row.get("lon") else None,
-                        "found": row.get("found") == "True",
-                        "warning": row.get("warning") or None,
-                    }
-            return cache
+        warnings.warn(
+            "Cache de geocodificação em .json/.csv é regravado a cada consulta; "
+            "use um cache_path .sqlite.",
+            DeprecationWarning,
+            stacklevel=3,
+        )
+        return _read_legacy_cache(self.cache_path)
 
-        raise ValueError("cache_path deve usar extensão .json ou .csv")
+    def _migrate_legacy_cache(self, cache: SqliteGeocodeCache) -> None:
+        """Importa para o SQLite vazio um cache ``.json``/``.csv`` de mesmo nome, se existir."""
+        for suffix in LEGACY_CACHE_SUFFIXES:
+            legacy_path = self.cache_path.with_suffix(suffix)
+            entries = _read_legacy_cache(legacy_path)
+            if entries:
+                cache.update(entries)
+                logger.info("Cache legado %s importado para %s (%d entradas)", legacy_path, self.cache_path, len(entries))
+                return
 
     def _save_cache(self) -> None:
+        if isinstance(self._cache, SqliteGeocodeCache):
+            # Cada inserção já foi persistida pelo próprio cache SQLite.
+            return
+
         self.cache_path.parent.mkdir(parents=True, exist_ok=True)
 
         if self.cache_path.suffix.lower() == ".json":
@@ -187,9 +383,9 @@ class GeocodingClient:
                     writer.writerow({"cache_key": key, **value})
             return
 
-        raise ValueError("cache_path deve usar extensão .json ou .csv")
+        raise ValueError("cache_path deve usar extensão .sqlite, .json ou .csv")
 
-    def _dict_to_result(self, value: dict[str, str | float | bool | None], source: str) -> GeocodeResult:
+    def _dict_to_result(self, value: CacheEntry, source: str) -> GeocodeResult:
         return GeocodeResult(
             cidade=str(value.get("cidade", "")),
             uf=str(value.get("uf", "")),
@@ -200,7 +396,7 @@ class GeocodingClient:
             source=source,
         )
 
-    def _result_to_dict(self, result: GeocodeResult) -> dict[str, str | float | bool | None]:
+    def _result_to_dict(self, result: GeocodeResult) -> CacheEntry:
         return {
             "cidade": result.cidade,
             "uf": result.uf,
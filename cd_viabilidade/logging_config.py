@@ -1,12 +1,19 @@
 """Configuração de logging padronizada."""
 
 import logging
+from functools import lru_cache
 from typing import Optional
 
 
+@lru_cache(maxsize=None)
 def configure_logging(level: int = logging.INFO, logger_name: Optional[str] = None) -> logging.Logger:
     """Configura logging padronizado e retorna um logger.
 
+    Memorizada por argumentos: chamadas repetidas com o mesmo nome e nível devolvem o
+    logger já obtido sem repassar por ``basicConfig``. Como em ``logging.basicConfig``,
+    o nível da primeira chamada configura o root; chamadas posteriores com outro
+    ``level`` não o alteram (use ``logging.getLogger().setLevel`` para isso).
+
     Args:
         level: Nível de logging.
         logger_name: Nome do logger; se None, usa root.
@@ -10,12 +10,15 @@ from .logging_config import configure_logging
 logger = configure_logging(logger_name=__name__)
 
 
-def _row_value(row: pd.Series, primary: str, fallback: str | None = None) -> str:
-    if primary in row and pd.notna(row[primary]):
-        return str(row[primary])
-    if fallback and fallback in row and pd.notna(row[fallback]):
-        return str(row[fallback])
-    return "N/A"
+def _id_values(df: pd.DataFrame, primary: str, fallback: str | None = None) -> list[str]:
+    """Identificadores como texto, usando ``fallback`` quando ``primary`` falta e ``N/A`` em último caso."""
+    ids = pd.Series("N/A", index=df.index, dtype=object)
+    for column in (fallback, primary):
+        if column and column in df.columns:
+            values = df[column]
+            present = values.notna()
+            ids[present] = values[present].astype(str)
+    return ids.tolist()
 
 
 def build_map(
@@ -30,19 +33,20 @@ def build_map(
     center = [clients["lat"].mean(), clients["lon"].mean()]
     fmap = folium.Map(location=center, zoom_start=5)
 
-    for _, row in facilities.iterrows():
-        facility_id = _row_value(row, "facility_id", "id")
+    facility_ids = _id_values(facilities, "facility_id", "id")
+    client_ids = _id_values(clients, "client_id", "id")
+
+    for facility_id, lat, lon in zip(facility_ids, facilities["lat"], facilities["lon"]):
         is_selected = facility_id in selected
         folium.Marker(
-            [row["lat"], row["lon"]],
+            [lat, lon],
             tooltip=f"Candidato {facility_id}",
             icon=folium.Icon(color="red" if is_selected else "blue", icon="home" if is_selected else "flag"),
         ).add_to(fmap)
 
-    for _, row in clients.iterrows():
-        client_id = _row_value(row, "client_id", "id")
+    for client_id, lat, lon in zip(client_ids, clients["lat"], clients["lon"]):
         folium.CircleMarker(
-            [row["lat"], row["lon"]],
+            [lat, lon],
             radius=4,
             tooltip=f"Demanda {client_id}",
             color="green",
@@ -51,17 +55,15 @@ def build_map(
         ).add_to(fmap)
 
     if assignments is not None and not assignments.empty:
-        client_index = clients.set_index(clients.get("client_id", clients.get("id")))
-        facility_index = facilities.set_index(facilities.get("facility_id", facilities.get("id")))
-        for _, row in assignments.iterrows():
-            client_id = str(row["client_id"])
-            facility_id = str(row["facility_id"])
-            if client_id not in client_index.index or facility_id not in facility_index.index:
+        client_coords = dict(zip(client_ids, zip(clients["lat"], clients["lon"])))
+        facility_coords = dict(zip(facility_ids, zip(facilities["lat"], facilities["lon"])))
+        for client_id, facility_id in zip(
+            assignments["client_id"].astype(str), assignments["facility_id"].astype(str)
+        ):
+            if client_id not in client_coords or facility_id not in facility_coords:
                 continue
-            c = client_index.loc[client_id]
-            f = facility_index.loc[facility_id]
             folium.PolyLine(
-                [(c["lat"], c["lon"]), (f["lat"], f["lon"])],
+                [client_coords[client_id], facility_coords[facility_id]],
                 color="orange" if facility_id in selected else "gray",
                 weight=2,
                 opacity=0.7,
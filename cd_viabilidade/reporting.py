@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import io
+from functools import lru_cache
 from pathlib import Path
+from string import Template
 from typing import Iterable
 
 from .financials import FinancialIndicators, FinancialSummary
@@ -10,98 +13,131 @@ from .logging_config import configure_logging
 
 logger = configure_logging(logger_name=__name__)
 
+_REQUIRED_EXEC_SCENARIOS: frozenset[str] = frozenset({"base"})
+
+_SUMMARY_LINE = "- {name}: custo anual {cost:.2f}\n"
+_COMPARATIVE_LINE = "- {name} vs base: redução anual estimada {delta:.2f}\n"
+_INDICATOR_LINE = "- {name}: VPL={npv:.2f}, Payback={simple}, Payback descontado={discounted}, ROI={roi:.2%}\n"
+
+# Layouts compilados uma vez; cada bloco ``$...`` recebe linhas já terminadas em ``\n``.
+_REPORT_TEMPLATE = Template(
+    "# Relatório de Viabilidade Logística\n"
+    "\n"
+    "## Instalações Selecionadas\n"
+    "${facilities}"
+    "\n"
+    "## Indicadores\n"
+    "- Custo total otimizado: ${total_cost}\n"
+    "- Receita: ${revenue}\n"
+    "- Custo variável: ${variable_cost}\n"
+    "- Custo fixo: ${fixed_cost}\n"
+    "- Margem: ${margin}"
+)
+
+_EXECUTIVE_TEMPLATE = Template(
+    "# Relatório Executivo de Viabilidade\n"
+    "\n"
+    "## Resumo dos cenários\n"
+    "${summary}"
+    "\n"
+    "## Custos comparativos\n"
+    "${comparative}"
+    "\n"
+    "## Indicadores financeiros\n"
+    "${indicators}"
+    "\n"
+    "## Recomendação acionável\n"
+    "- ${recommendation}, priorizando critérios financeiros de VPL e recuperação de investimento."
+)
+
+
+def _stream_block(lines: Iterable[str]) -> str:
+    """Escreve as linhas de uma seção direto no buffer, sem materializar a lista intermediária."""
+    buffer = io.StringIO()
+    buffer.writelines(lines)
+    return buffer.getvalue()
+
 
 def write_markdown_report(output_path: Path, selected_facilities: Iterable[str], summary: FinancialSummary, total_cost: float) -> Path:
     """Gera relatório markdown com principais indicadores operacionais."""
-    content = "\n".join(
-        [
-            "# Relatório de Viabilidade Logística",
-            "",
-            "## Instalações Selecionadas",
-            *[f"- {fac}" for fac in selected_facilities],
-            "",
-            "## Indicadores",
-            f"- Custo total otimizado: {total_cost:.2f}",
-            f"- Receita: {summary.revenue:.2f}",
-            f"- Custo variável: {summary.variable_cost:.2f}",
-            f"- Custo fixo: {summary.fixed_cost:.2f}",
-            f"- Margem: {summary.margin:.2f}",
-        ]
+    content = _REPORT_TEMPLATE.substitute(
+        facilities=_stream_block(f"- {fac}\n" for fac in selected_facilities),
+        total_cost=f"{total_cost:.2f}",
+        revenue=f"{summary.revenue:.2f}",
+        variable_cost=f"{summary.variable_cost:.2f}",
+        fixed_cost=f"{summary.fixed_cost:.2f}",
+        margin=f"{summary.margin:.2f}",
     )
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(content, encoding="utf-8")
+    output_path.write_bytes(content.encode("utf-8"))
     logger.info("Relatório salvo em %s", output_path)
     return output_path
 
 
+@lru_cache(maxsize=1024)
 def _format_payback(payback: float | None) -> str:
     return "não recupera no horizonte" if payback is None else f"{payback:.2f} anos"
 
 
+@lru_cache(maxsize=1024)
+def _format_indicator_line(name: str, indicators: FinancialIndicators) -> str:
+    """Linha de indicadores de um cenário; memorizada, pois relatórios de uma varredura repetem cenários."""
+    return _INDICATOR_LINE.format(
+        name=name,
+        npv=indicators.npv,
+        simple=_format_payback(indicators.payback_simple),
+        discounted=_format_payback(indicators.payback_discounted),
+        roi=indicators.roi,
+    )
+
+
 def generate_executive_report(
     scenario_costs: dict[str, float],
     scenario_indicators: dict[str, FinancialIndicators],
     output_dir: Path = Path("outputs"),
 ) -> Path:
     """Gera relatório executivo com recomendação acionável baseada no cenário base."""
-    if "base" not in scenario_costs or "base" not in scenario_indicators:
+    if (_REQUIRED_EXEC_SCENARIOS - scenario_costs.keys()) or (_REQUIRED_EXEC_SCENARIOS - scenario_indicators.keys()):
         raise ValueError("Cenário 'base' é obrigatório no relatório executivo")
 
-    shared_scenarios = sorted(set(scenario_costs).intersection(scenario_indicators))
+    shared_scenarios = tuple(sorted(scenario_costs.keys() & scenario_indicators.keys()))
     if not shared_scenarios:
         raise ValueError("Nenhum cenário comum entre custos e indicadores")
 
     base_cost = scenario_costs["base"]
     base_ind = scenario_indicators["base"]
 
-    candidate_names = [name for name in shared_scenarios if name != "base"]
-    best_name = "base"
-    best_npv = base_ind.npv
-    for name in candidate_names:
-        if scenario_indicators[name].npv > best_npv:
-            best_npv = scenario_indicators[name].npv
-            best_name = name
+    best_name = max(
+        (name for name in shared_scenarios if name != "base"),
+        key=lambda name: scenario_indicators[name].npv,
+        default="base",
+    )
+    if best_name != "base" and scenario_indicators[best_name].npv <= base_ind.npv:
+        best_name = "base"
 
     if best_name == "base":
         recommendation = "Manter cenário base"
     else:
         recommendation = f"Avançar com cenário {best_name}"
 
-    summary_lines = [f"- {name}: custo anual {scenario_costs[name]:.2f}" for name in shared_scenarios]
-    comparative_lines = [
-        f"- {name} vs base: redução anual estimada {base_cost - scenario_costs[name]:.2f}"
-        for name in candidate_names
-    ]
-    indicator_lines = [
-        (
-            f"- {name}: VPL={scenario_indicators[name].npv:.2f}, "
-            f"Payback={_format_payback(scenario_indicators[name].payback_simple)}, "
-            f"Payback descontado={_format_payback(scenario_indicators[name].payback_discounted)}, "
-            f"ROI={scenario_indicators[name].roi:.2%}"
-        )
-        for name in shared_scenarios
-    ]
-
-    content = "\n".join(
-        [
-            "# Relatório Executivo de Viabilidade",
-            "",
-            "## Resumo dos cenários",
-            *summary_lines,
-            "",
-            "## Custos comparativos",
-            *comparative_lines,
-            "",
-            "## Indicadores financeiros",
-            *indicator_lines,
-            "",
-            "## Recomendação acionável",
-            f"- {recommendation}, priorizando critérios financeiros de VPL e recuperação de investimento.",
-        ]
+    # Uma única passada pelos cenários alimenta as três seções.
+    summary, comparative, indicators = io.StringIO(), io.StringIO(), io.StringIO()
+    for name in shared_scenarios:
+        cost = scenario_costs[name]
+        summary.write(_SUMMARY_LINE.format(name=name, cost=cost))
+        if name != "base":
+            comparative.write(_COMPARATIVE_LINE.format(name=name, delta=base_cost - cost))
+        indicators.write(_format_indicator_line(name, scenario_indicators[name]))
+
+    content = _EXECUTIVE_TEMPLATE.substitute(
+        summary=summary.getvalue(),
+        comparative=comparative.getvalue(),
+        indicators=indicators.getvalue(),
+        recommendation=recommendation,
     )
 
     output_path = output_dir / "relatorio_executivo.md"
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(content, encoding="utf-8")
+    output_path.write_bytes(content.encode("utf-8"))
     logger.info("Relatório executivo salvo em %s", output_path)
     return output_path
@@ -5,9 +5,10 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, Mapping
 
+import numpy as np
 import pandas as pd
 
-from .cost_matrix import build_cost_matrix
+from .cost_matrix import build_cost_matrix, build_dense_cost_matrix, cached_distance_grid
 from .logging_config import configure_logging
 
 logger = configure_logging(logger_name=__name__)
@@ -23,6 +24,9 @@ class ScenarioConfig:
     limite_novos_cds: int | None = None
 
 
+# Abaixo desta fração de clientes com multiplicador, ``apply_demand_scenario`` usa máscara esparsa.
+SPARSE_MULTIPLIER_RATIO = 0.05
+
 DEFAULT_SCENARIOS: Dict[str, ScenarioConfig] = {
     "base": ScenarioConfig(),
     "1_novo_cd": ScenarioConfig(limite_novos_cds=1),
@@ -41,77 +45,144 @@ def _resolve_demand_column(df: pd.DataFrame) -> str:
     raise ValueError("DataFrame de demanda deve conter coluna 'demanda' ou 'demand'.")
 
 
-def apply_demand_scenario(clients: pd.DataFrame, multipliers: Dict[str, float]) -> pd.DataFrame:
-    """Aplica multiplicadores de demanda por cliente."""
-    df = clients.copy()
-    demand_col = _resolve_demand_column(df)
-    df["demand_scenario"] = [
-        round(getattr(row, demand_col) * multipliers.get(row.client_id, 1.0), 2)
-        for row in df.itertuples()
-    ]
+def apply_demand_scenario(
+    clients: pd.DataFrame,
+    multipliers: Dict[str, float],
+    *,
+    inplace: bool = False,
+) -> pd.DataFrame:
+    """Aplica multiplicadores de demanda por cliente.
+
+    Com ``inplace=True`` a coluna ``demand_scenario`` é gravada no próprio ``clients``;
+    caso contrário, numa cópia rasa que compartilha as demais colunas.
+    """
+    demand_col = _resolve_demand_column(clients)
+    demand = clients[demand_col].to_numpy(dtype="float64", copy=True)
+    if len(multipliers) < SPARSE_MULTIPLIER_RATIO * len(clients):
+        # Poucos clientes ajustados: multiplica só as exceções, sem vetor denso de fatores.
+        mask = clients["client_id"].isin(multipliers.keys()).to_numpy()
+        demand[mask] *= clients.loc[mask, "client_id"].map(multipliers).to_numpy(dtype="float64")
+    else:
+        demand *= clients["client_id"].map(multipliers).astype("float64").fillna(1.0).to_numpy()
+    df = clients if inplace else clients.copy(deep=False)
+    df["demand_scenario"] = np.round(demand, 2)
     logger.info("Cenário aplicado para %d clientes", len(df))
     return df
 
 
+def _scenario_demand_points(demand_points: pd.DataFrame) -> pd.DataFrame:
+    """Expõe a demanda como coluna ``demanda``; o crescimento entra via ``demand_scale``."""
+    demand_col = _resolve_demand_column(demand_points)
+    if demand_col == "demanda":
+        return demand_points
+    return demand_points.rename(columns={demand_col: "demanda"})
+
+
+def _scenario_cost_key(scenario: ScenarioConfig) -> tuple[float, float, float]:
+    """Campos do cenário que afetam a matriz de custos (``limite_novos_cds`` não afeta)."""
+    return (scenario.crescimento_demanda, scenario.fator_tributario, scenario.fator_salarial)
+
+
+def _scenario_cost_params(scenario: ScenarioConfig) -> Dict[str, float]:
+    return {
+        "tributacao": scenario.fator_tributario,
+        "salario_logistica": scenario.fator_salarial,
+    }
+
+
 def apply_scenario_and_recompute_costs(
     candidates: pd.DataFrame,
     demand_points: pd.DataFrame,
     scenario: ScenarioConfig,
     tarifa_km: float = 1.2,
+    distance_grid: np.ndarray | None = None,
 ) -> pd.DataFrame:
-    """Aplica cenário nos dados de demanda e recompõe a matriz de custos."""
-    demand_col = _resolve_demand_column(demand_points)
-
-    scenario_demand = demand_points.copy()
-    scenario_demand["demanda"] = (
-        scenario_demand[demand_col].astype(float) * (1 + scenario.crescimento_demanda)
-    )
+    """Aplica cenário nos dados de demanda e recompõe a matriz de custos.
 
+    ``distance_grid`` reaproveita distâncias pré-calculadas; sem ela, usa a grade em
+    cache para as mesmas coordenadas (ver ``cached_distance_grid``).
+    """
+    if distance_grid is None:
+        distance_grid = cached_distance_grid(candidates, demand_points)
     cost_matrix = build_cost_matrix(
         candidates,
-        scenario_demand,
+        _scenario_demand_points(demand_points),
         tarifa_km=tarifa_km,
-        scenario_params={
-            "tributacao": scenario.fator_tributario,
-            "salario_logistica": scenario.fator_salarial,
-        },
+        scenario_params=_scenario_cost_params(scenario),
+        distance_grid=distance_grid,
+        demand_scale=1 + scenario.crescimento_demanda,
     )
     return cost_matrix
 
 
+def summarize_scenario(
+    scenario_name: str,
+    scenario: ScenarioConfig,
+    total_freight_cost: float,
+    total_demand: float,
+) -> dict[str, float | int | str | None]:
+    """Monta a linha do comparativo de cenários a partir dos totais da matriz de custos."""
+    return {
+        "scenario": scenario_name,
+        "crescimento_demanda": scenario.crescimento_demanda,
+        "fator_tributario": scenario.fator_tributario,
+        "fator_salarial": scenario.fator_salarial,
+        "limite_novos_cds": scenario.limite_novos_cds,
+        "total_demand": round(total_demand, 4),
+        "total_freight_cost": round(total_freight_cost, 2),
+        "avg_cost_per_unit": round(total_freight_cost / total_demand, 6) if total_demand else 0.0,
+    }
+
+
+def build_comparative_table(rows: list[dict[str, float | int | str | None]]) -> pd.DataFrame:
+    """Consolida as linhas de :func:`summarize_scenario` em tabela ordenada por cenário."""
+    comparative_df = pd.DataFrame(rows).sort_values("scenario").reset_index(drop=True)
+    logger.info("Execução em lote concluída para %d cenários", len(comparative_df))
+    return comparative_df
+
+
 def run_scenarios_batch(
     candidates: pd.DataFrame,
     demand_points: pd.DataFrame,
     scenarios: Mapping[str, ScenarioConfig] | None = None,
     tarifa_km: float = 1.2,
+    distance_grid: np.ndarray | None = None,
 ) -> pd.DataFrame:
-    """Executa múltiplos cenários e retorna tabela comparativa consolidada."""
+    """Executa múltiplos cenários e retorna tabela comparativa consolidada.
+
+    O frete é linear nos fatores de cenário (crescimento, tributação e salário), então a
+    matriz densa é calculada uma única vez com parâmetros neutros e cada cenário só
+    escala os totais base. Sem ``distance_grid``, a grade de distâncias vem do cache
+    por coordenadas.
+    """
     selected = dict(scenarios or DEFAULT_SCENARIOS)
+    if distance_grid is None:
+        distance_grid = cached_distance_grid(candidates, demand_points)
 
+    neutral = ScenarioConfig()
+    base = build_dense_cost_matrix(
+        candidates,
+        _scenario_demand_points(demand_points),
+        tarifa_km=tarifa_km,
+        scenario_params=_scenario_cost_params(neutral),
+        distance_grid=distance_grid,
+    )
+    # Totais equivalentes à soma sobre a matriz longa (demanda repetida por instalação).
+    base_freight_cost = float(np.nansum(base.freight_cost))
+    base_demand = float(np.nansum(base.demand)) * len(base.facility_ids)
+
+    # Cenários que só diferem em ``limite_novos_cds`` compartilham os mesmos totais.
+    totals_by_key: dict[tuple[float, float, float], tuple[float, float]] = {}
     comparative_rows: list[dict[str, float | int | str | None]] = []
     for scenario_name, scenario in selected.items():
-        cost_matrix = apply_scenario_and_recompute_costs(
-            candidates=candidates,
-            demand_points=demand_points,
-            scenario=scenario,
-            tarifa_km=tarifa_km,
-        )
-
-        total_freight_cost = float(cost_matrix["freight_cost"].sum())
-        total_demand = float(cost_matrix["demanda"].sum())
-        comparative_rows.append(
-            {
-                "scenario": scenario_name,
-                "crescimento_demanda": scenario.crescimento_demanda,
-                "fator_tributario": scenario.fator_tributario,
-                "fator_salarial": scenario.fator_salarial,
-                "limite_novos_cds": scenario.limite_novos_cds,
-                "total_demand": round(total_demand, 4),
-                "total_freight_cost": round(total_freight_cost, 2),
-                "avg_cost_per_unit": round(total_freight_cost / total_demand, 6) if total_demand else 0.0,
-            }
-        )
-
-    comparative_df = pd.DataFrame(comparative_rows).sort_values("scenario").reset_index(drop=True)
-    logger.info("Execução em lote concluída para %d cenários", len(comparative_df))
-    return comparative_df
+        key = _scenario_cost_key(scenario)
+        if key not in totals_by_key:
+            growth = 1 + scenario.crescimento_demanda
+            totals_by_key[key] = (
+                base_freight_cost * growth * (1 + scenario.fator_tributario) * scenario.fator_salarial,
+                base_demand * growth,
+            )
+        total_freight_cost, total_demand = totals_by_key[key]
+        comparative_rows.append(summarize_scenario(scenario_name, scenario, total_freight_cost, total_demand))
+
+    return build_comparative_table(comparative_rows)
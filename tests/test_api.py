@@ -1,5 +1,92 @@
-from cd_viabilidade.api import healthcheck
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from cd_viabilidade import api
+from cd_viabilidade.api import app, healthcheck
+from cd_viabilidade.config import AppConfig
+from cd_viabilidade.scenarios import ScenarioConfig
 
 
 def test_healthcheck():
     assert healthcheck()["status"] == "ok"
+
+
+def test_optimize_reuses_cached_result_for_repeated_payload(monkeypatch, tmp_path):
+    calls = []
+    config = AppConfig(output_dir=tmp_path)
+
+    def fake_execute_scenario(config, scenario_name, scenario):
+        calls.append(config)
+        return {"scenario": scenario_name, "selected_facilities": ["F1"]}
+
+    monkeypatch.setattr(api, "execute_scenario", fake_execute_scenario)
+    api._cached_scenario.cache_clear()
+    app.dependency_overrides[api.get_config] = lambda: config
+    client = TestClient(app)
+    payload = {"scenario_name": "stress", "fator_tributario": 0.05}
+
+    first = client.post("/optimize", json=payload)
+    second = client.post("/optimize", json=payload)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == {"scenario": "stress", "selected_facilities": ["F1"]}
+    assert calls == [config]
+    api._cached_scenario.cache_clear()
+    app.dependency_overrides.clear()
+
+
+def test_run_scenario_recomputes_when_input_csv_changes(monkeypatch, tmp_path):
+    calls = []
+    config = AppConfig(data_dir=tmp_path, output_dir=tmp_path / "outputs")
+    clients_csv = tmp_path / "clients.csv"
+    clients_csv.write_text("client_id,lat,lon,demanda\nC1,-23.5,-46.6,10\n", encoding="utf-8")
+
+    def fake_execute_scenario(config, scenario_name, scenario):
+        calls.append(scenario_name)
+        return {"scenario": scenario_name}
+
+    monkeypatch.setattr(api, "execute_scenario", fake_execute_scenario)
+    api._cached_scenario.cache_clear()
+
+    first = api._run_scenario(config, "base", ScenarioConfig())
+    assert api._run_scenario(config, "base", ScenarioConfig()) is first
+    clients_csv.write_text("client_id,lat,lon,demanda\nC1,-23.5,-46.6,20\nC2,-22.9,-43.2,5\n", encoding="utf-8")
+    api._run_scenario(config, "base", ScenarioConfig())
+
+    assert calls == ["base", "base"]
+    api._cached_scenario.cache_clear()
+
+
+def test_scenario_batcher_deduplicates_concurrent_requests():
+    calls = []
+
+    def runner(config, scenario_name, scenario):
+        calls.append((scenario_name, scenario))
+        return {"scenario": scenario_name}
+
+    async def submit_all():
+        batcher = api.ScenarioBatcher(runner, max_batch_size=8, max_wait_ms=20)
+        tributo = ScenarioConfig(fator_tributario=0.05)
+        return await asyncio.gather(
+            batcher.submit(api.CONFIG, "a", tributo),
+            batcher.submit(api.CONFIG, "a", tributo),
+            batcher.submit(api.CONFIG, "b", ScenarioConfig()),
+        )
+
+    results = asyncio.run(submit_all())
+
+    assert [r["scenario"] for r in results] == ["a", "a", "b"]
+    assert results[0] is not results[1]
+    assert len(calls) == 2
+
+
+def test_report_preview_is_bounded(monkeypatch, tmp_path):
+    report_path = tmp_path / "relatorio_executivo.md"
+    report_path.write_text("# Relatório\n" + "x" * 5000, encoding="utf-8")
+    monkeypatch.setattr(api, "_report_path", lambda config: report_path)
+
+    response = TestClient(app).get("/report")
+
+    assert response.status_code == 200
+    assert response.json()["preview"] == ("# Relatório\n" + "x" * 5000)[: api.REPORT_PREVIEW_CHARS]
@@ -1,5 +1,16 @@
-from cd_viabilidade.cli import run_pipeline
+import pandas as pd
+import pytest
+
+from cd_viabilidade.cli import (
+    _resolve_facility_groups,
+    build_parser,
+    generate_report,
+    load_pipeline_inputs,
+    run_pipeline,
+    run_scenarios,
+)
 from cd_viabilidade.config import AppConfig
+from cd_viabilidade.scenarios import DEFAULT_SCENARIOS, run_scenarios_batch
 
 
 def test_run_pipeline_generates_outputs(tmp_path):
@@ -13,3 +24,66 @@ def test_base_and_two_new_cds_open_different_counts(tmp_path):
     base = run_pipeline(cfg, scenario_name="base")
     two = run_pipeline(cfg, scenario_name="2_novos_cds")
     assert len(two["selected_facilities"]) >= len(base["selected_facilities"])
+
+
+def test_pipeline_inputs_reuse_cost_matrix_for_equal_cost_parameters(tmp_path):
+    cfg = AppConfig(data_dir=AppConfig().data_dir, output_dir=tmp_path)
+    inputs = load_pipeline_inputs(cfg)
+
+    base = inputs.cost_matrix(DEFAULT_SCENARIOS["base"])
+    one_new = inputs.cost_matrix(DEFAULT_SCENARIOS["1_novo_cd"])
+    growth = inputs.cost_matrix(DEFAULT_SCENARIOS["crescimento_10"])
+
+    assert one_new is base
+    assert growth is not base
+    assert inputs.distance_grid.shape == (len(inputs.facilities), len(inputs.clients))
+
+
+def test_generate_report_parallel_matches_serial(tmp_path):
+    serial = generate_report(AppConfig(output_dir=tmp_path / "serial", scenario_workers=1))
+    parallel = generate_report(AppConfig(output_dir=tmp_path / "parallel", scenario_workers=2))
+    assert parallel.read_text(encoding="utf-8") == serial.read_text(encoding="utf-8")
+
+
+def test_parser_rejects_non_positive_workers():
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["--workers", "0", "run-scenarios"])
+
+
+def test_run_scenarios_comparative_matches_batch_totals(tmp_path):
+    cfg = AppConfig(output_dir=tmp_path)
+    inputs = load_pipeline_inputs(cfg)
+
+    comparative = run_scenarios(cfg, inputs=inputs)
+    expected = run_scenarios_batch(inputs.facilities, inputs.clients, DEFAULT_SCENARIOS)
+
+    pd.testing.assert_frame_equal(comparative, expected)
+    assert (tmp_path / "comparativo_cenarios.csv").exists()
+
+
+def test_resolve_facility_groups_accepts_mixed_existing_flags():
+    facilities = pd.DataFrame(
+        {
+            "facility_id": ["F1", "F2", "F3", "F4", "F5"],
+            "is_existing": [True, "sim", "0", None, 1],
+        }
+    )
+
+    existing, candidates = _resolve_facility_groups(facilities)
+
+    assert existing == ["F1", "F2", "F5"]
+    assert candidates == ["F3", "F4"]
+
+
+def test_resolve_facility_groups_matches_flags_case_insensitively():
+    facilities = pd.DataFrame(
+        {
+            "facility_id": ["F1", "F2", "F3", "F4", "F5"],
+            "is_existing": ["Sim", "TRUE", " yes ", "Não", "False"],
+        }
+    )
+
+    existing, candidates = _resolve_facility_groups(facilities)
+
+    assert existing == ["F1", "F2", "F3"]
+    assert candidates == ["F4", "F5"]
@@ -4,3 +4,4 @@ from cd_viabilidade.config import AppConfig
 def test_config_defaults():
     cfg = AppConfig()
     assert cfg.default_facility_limit == 2
+    assert cfg.solver_threads == 1
@@ -1,8 +1,15 @@
 import math
 
+import numpy as np
 import pandas as pd
 
-from cd_viabilidade.cost_matrix import build_cost_matrix
+from cd_viabilidade import cost_matrix
+from cd_viabilidade.cost_matrix import (
+    build_cost_matrix,
+    build_dense_cost_matrix,
+    build_distance_grid,
+    cached_distance_grid,
+)
 
 
 def test_build_cost_matrix_distance_is_positive():
@@ -32,6 +39,8 @@ def test_build_cost_matrix_costs_are_consistent_with_scenario_params():
 
     assert math.isclose(long_df.loc[0, "freight_cost"], expected, abs_tol=0.05)
     assert math.isclose(pivot_df.loc["C1", "F1"], expected, abs_tol=0.05)
+    assert long_df.attrs == {"tributacao": 0.1, "salario_logistica": 1.2}
+    assert "tributacao" not in long_df.columns
 
 
 def test_build_cost_matrix_with_missing_coordinates_returns_na_costs():
@@ -42,3 +51,146 @@ def test_build_cost_matrix_with_missing_coordinates_returns_na_costs():
 
     assert pd.isna(cost_df.loc[0, "distance_km"])
     assert pd.isna(cost_df.loc[0, "freight_cost"])
+
+
+def test_build_cost_matrix_grid_order_and_haversine_distance():
+    candidates = pd.DataFrame(
+        [
+            {"facility_id": "F1", "lat": -23.5505, "lon": -46.6333},
+            {"facility_id": "F2", "lat": -22.9068, "lon": -43.1729},
+        ]
+    )
+    demand_points = pd.DataFrame(
+        [
+            {"client_id": "C1", "lat": -23.5505, "lon": -46.6333, "demanda": 1},
+            {"client_id": "C2", "lat": -22.9068, "lon": -43.1729, "demanda": 1},
+        ]
+    )
+
+    cost_df = build_cost_matrix(candidates, demand_points, tarifa_km=1.0)
+
+    assert cost_df["facility_id"].tolist() == ["F1", "F1", "F2", "F2"]
+    assert cost_df["client_id"].tolist() == ["C1", "C2", "C1", "C2"]
+    assert cost_df.loc[0, "distance_km"] == 0
+    # São Paulo - Rio de Janeiro: ~361 km em linha reta
+    assert math.isclose(cost_df.loc[1, "distance_km"], 361.0, rel_tol=0.01)
+    assert cost_df.loc[1, "distance_km"] == cost_df.loc[2, "distance_km"]
+
+
+def test_build_cost_matrix_with_precomputed_distance_grid_matches_direct_build():
+    candidates = pd.DataFrame([{"facility_id": "F1", "lat": -23.5, "lon": -46.6}])
+    demand_points = pd.DataFrame([{"client_id": "C1", "lat": -22.9, "lon": -43.3, "demanda": 10}])
+
+    grid = build_distance_grid(candidates, demand_points)
+    direct = build_cost_matrix(candidates, demand_points, scenario_params={"tributacao": 0.05})
+    reused = build_cost_matrix(
+        candidates, demand_points, scenario_params={"tributacao": 0.05}, distance_grid=grid
+    )
+
+    assert math.isclose(reused.loc[0, "freight_cost"], direct.loc[0, "freight_cost"], abs_tol=0.01)
+    assert reused.loc[0, "distance_km"] == direct.loc[0, "distance_km"]
+
+
+def test_build_cost_matrix_demand_scale_matches_prescaled_demand_without_mutating_input():
+    candidates = pd.DataFrame([{"facility_id": "F1", "lat": -23.5, "lon": -46.6}])
+    demand_points = pd.DataFrame([{"client_id": "C1", "lat": -22.9, "lon": -43.3, "demanda": 10.0}])
+    prescaled = demand_points.assign(demanda=demand_points["demanda"] * 1.1)
+
+    scaled = build_cost_matrix(candidates, demand_points, demand_scale=1.1)
+    expected = build_cost_matrix(candidates, prescaled)
+
+    assert math.isclose(scaled.loc[0, "demanda"], expected.loc[0, "demanda"])
+    assert scaled.loc[0, "freight_cost"] == expected.loc[0, "freight_cost"]
+    assert demand_points.loc[0, "demanda"] == 10.0
+
+
+def test_build_dense_cost_matrix_grid_and_kernel_paths_produce_equal_costs():
+    candidates = pd.DataFrame(
+        [
+            {"facility_id": "F1", "lat": -23.5505, "lon": -46.6333},
+            {"facility_id": "F2", "lat": -3.7319, "lon": -38.5267},
+        ]
+    )
+    demand_points = pd.DataFrame(
+        [
+            {"client_id": "C1", "lat": -22.9068, "lon": -43.1729, "demanda": 12345.6},
+            {"client_id": "C2", "lat": -30.0346, "lon": -51.2177, "demanda": 987.25},
+            {"client_id": "C3", "lat": -15.7939, "lon": -47.8828, "demanda": 45210.0},
+        ]
+    )
+    params = {"tributacao": 0.17, "salario_logistica": 1.08}
+
+    direct = build_dense_cost_matrix(candidates, demand_points, tarifa_km=1.37, scenario_params=params)
+    gridded = build_dense_cost_matrix(
+        candidates,
+        demand_points,
+        tarifa_km=1.37,
+        scenario_params=params,
+        distance_grid=cached_distance_grid(candidates, demand_points),
+    )
+
+    np.testing.assert_array_equal(gridded.freight_cost, direct.freight_cost)
+    np.testing.assert_array_equal(gridded.distance_km, direct.distance_km)
+
+
+def test_build_cost_matrix_dense_format_matches_long_format():
+    candidates = pd.DataFrame(
+        [
+            {"facility_id": "F1", "lat": -23.5, "lon": -46.6},
+            {"facility_id": "F2", "lat": -22.9, "lon": -43.2},
+        ]
+    )
+    demand_points = pd.DataFrame(
+        [
+            {"client_id": "C1", "lat": -23.6, "lon": -46.7, "demanda": 10},
+            {"client_id": "C2", "lat": -22.9, "lon": -43.3, "demanda": 20},
+            {"client_id": "C3", "lat": -19.9, "lon": -43.9, "demanda": 5},
+        ]
+    )
+
+    long_df = build_cost_matrix(candidates, demand_points)
+    dense = build_dense_cost_matrix(candidates, demand_points)
+
+    assert dense.freight_cost.shape == (2, 3)
+    assert dense.distance_km.dtype == np.float32
+    assert dense.freight_cost.dtype == np.float64
+    assert list(dense.facility_ids) == ["F1", "F2"]
+    assert list(dense.client_ids) == ["C1", "C2", "C3"]
+    assert dense.freight_cost.ravel().tolist() == long_df["freight_cost"].tolist()
+    assert dense.to_pivot().loc["C3", "F2"] == dense.freight_cost[1, 2]
+    pd.testing.assert_frame_equal(dense.to_long(), long_df)
+
+
+def test_build_cost_matrix_numpy_fallback_matches_default_path(monkeypatch):
+    candidates = pd.DataFrame(
+        [
+            {"facility_id": "F1", "lat": -23.5, "lon": -46.6},
+            {"facility_id": "F2", "lat": -22.9, "lon": -43.2},
+        ]
+    )
+    demand_points = pd.DataFrame(
+        [
+            {"client_id": "C1", "lat": -23.6, "lon": -46.7, "demanda": 10},
+            {"client_id": "C2", "lat": None, "lon": -43.3, "demanda": 20},
+        ]
+    )
+    params = {"tributacao": 0.1, "salario_logistica": 1.2}
+
+    default = build_cost_matrix(candidates, demand_points, scenario_params=params)
+    monkeypatch.setattr(cost_matrix, "njit", None)
+    fallback = build_cost_matrix(candidates, demand_points, scenario_params=params)
+
+    pd.testing.assert_frame_equal(fallback, default)
+
+
+def test_cached_distance_grid_reuses_grid_for_same_coordinates():
+    candidates = pd.DataFrame([{"facility_id": "F1", "lat": -23.5, "lon": -46.6}])
+    demand_points = pd.DataFrame([{"client_id": "C1", "lat": -22.9, "lon": -43.3, "demanda": 10}])
+
+    first = cached_distance_grid(candidates, demand_points)
+    second = cached_distance_grid(candidates.copy(), demand_points.assign(demanda=99))
+    moved = cached_distance_grid(candidates.assign(lat=-20.0), demand_points)
+
+    assert second is first
+    assert moved is not first
+    assert not first.flags.writeable
@@ -1,12 +1,18 @@
+import os
 from pathlib import Path
 
 import pandas as pd
 import pytest
 
+from cd_viabilidade import data_io
 from cd_viabilidade.data_io import (
+    INTERMEDIATE_SUFFIX,
     load_cds_candidatos_csv,
     load_demanda_csv,
+    load_csv,
     load_localidades_csv,
+    normalize_dataframe,
+    persist_intermediate_output,
 )
 
 
@@ -58,9 +64,9 @@ def test_loaders_happy_path_and_persist_outputs(tmp_path: Path):
     assert locais_float(localidades_df.loc[0, "lat"]) == -22.9
     assert cds_df.loc[0, "custo_fixo"] == pytest.approx(2500.50)
 
-    assert (output_dir / "demanda_normalizada.csv").exists()
-    assert (output_dir / "localidades_normalizadas.csv").exists()
-    assert (output_dir / "cds_candidatos_normalizados.csv").exists()
+    assert (output_dir / f"demanda_normalizada{INTERMEDIATE_SUFFIX}").exists()
+    assert (output_dir / f"localidades_normalizadas{INTERMEDIATE_SUFFIX}").exists()
+    assert (output_dir / f"cds_candidatos_normalizados{INTERMEDIATE_SUFFIX}").exists()
 
 
 def locais_float(value: object) -> float:
@@ -106,3 +112,127 @@ def test_empty_dataset_raises_value_error(tmp_path: Path):
 
     with pytest.raises(ValueError, match="está vazio"):
         load_localidades_csv(locais_path, output_dir=tmp_path / "outputs")
+
+
+def test_normalize_dataframe_stores_demand_as_int32_and_categorizes_uf():
+    df = pd.DataFrame(
+        {
+            "id": ["c1", "c2"],
+            "cidade": ["São Paulo", "Campinas"],
+            "uf": ["sp", "SP"],
+            "demanda": [100, 120],
+            "lat": [-23.55, -22.90],
+            "lon": [-46.63, -47.06],
+        }
+    )
+
+    normalized = normalize_dataframe(df, dataset_name="demanda")
+
+    assert isinstance(normalized["uf"].dtype, pd.CategoricalDtype)
+    assert list(normalized["uf"].cat.categories) == ["SP"]
+    assert normalized["demanda"].dtype == "int32"
+    assert (normalized["demanda"] * 2).tolist() == [200, 240]
+    assert (normalized["demanda"] * 1_000_000).tolist() == [100_000_000, 120_000_000]
+    assert normalized["lat"].dtype == "float64"
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "id,data,demanda,lat,ativo\nc1,2024-01-02,10,-23.55,true\nc2,2024-02-03,,-22.9,false\n",
+        "id,cidade,uf,lat,lon\n",
+    ],
+)
+def test_load_csv_engines_return_same_frame(tmp_path: Path, content: str):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "dados.csv"
+    path.write_text(content, encoding="utf-8")
+
+    c_df = load_csv(path, engine="c")
+    arrow_df = load_csv(path, engine="pyarrow")
+
+    pd.testing.assert_frame_equal(arrow_df, c_df)
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_load_csv_empty_file_raises_empty_data_error(tmp_path: Path, engine: str):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / "vazio.csv"
+    path.write_text("", encoding="utf-8")
+
+    with pytest.raises(pd.errors.EmptyDataError):
+        load_csv(path, engine=engine)
+
+
+def test_fresh_parquet_intermediate_is_reused_and_keeps_dtypes(tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    demanda_path = tmp_path / "demanda.csv"
+    output_dir = tmp_path / "outputs"
+    pd.DataFrame(
+        {"id": ["c1"], "cidade": ["Santos"], "uf": ["sp"], "demanda": [10], "lat": [-23.96], "lon": [-46.33]}
+    ).to_csv(demanda_path, index=False)
+
+    first = load_demanda_csv(demanda_path, output_dir=output_dir)
+    demanda_path.write_text("arquivo inválido", encoding="utf-8")
+    os.utime(demanda_path, (0, 0))
+    second = load_demanda_csv(demanda_path, output_dir=output_dir)
+
+    pd.testing.assert_frame_equal(second, first)
+    assert isinstance(second["uf"].dtype, pd.CategoricalDtype)
+
+
+def test_parquet_intermediate_with_same_mtime_as_source_is_not_reused(tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    demanda_path = tmp_path / "demanda.csv"
+    output_dir = tmp_path / "outputs"
+    row = {"id": ["c1"], "cidade": ["Santos"], "uf": ["sp"], "demanda": [10], "lat": [-23.96], "lon": [-46.33]}
+    pd.DataFrame(row).to_csv(demanda_path, index=False)
+    load_demanda_csv(demanda_path, output_dir=output_dir)
+
+    pd.DataFrame({**row, "demanda": [25]}).to_csv(demanda_path, index=False)
+    cache_mtime_ns = (output_dir / f"demanda_normalizada{INTERMEDIATE_SUFFIX}").stat().st_mtime_ns
+    os.utime(demanda_path, ns=(cache_mtime_ns, cache_mtime_ns))
+
+    assert load_demanda_csv(demanda_path, output_dir=output_dir).loc[0, "demanda"] == 25
+
+
+def test_persist_intermediate_output_honors_requested_suffix(tmp_path: Path):
+    df = pd.DataFrame({"id": ["c1"], "demanda": [10]})
+
+    csv_path = persist_intermediate_output(df, "saida.csv", tmp_path)
+
+    assert csv_path == tmp_path / "saida.csv"
+    pd.testing.assert_frame_equal(pd.read_csv(csv_path), df)
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_load_csv_usecols_and_dtype(tmp_path: Path, engine: str):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / "dados.csv"
+    path.write_text("id,extra,lat\n1,x,-23.5\n", encoding="utf-8")
+
+    df = load_csv(path, engine=engine, dtype={"id": "string", "ausente": "string"}, usecols=["id", "lat", "ausente"])
+
+    assert list(df.columns) == ["id", "lat"]
+    assert df["id"].dtype == "string"
+    assert df.loc[0, "id"] == "1"
+
+
+def test_load_csv_pyarrow_converts_only_requested_columns(tmp_path: Path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "dados.csv"
+    path.write_text("id,extra,lat\n1,x,-23.5\n", encoding="utf-8")
+    included = []
+    read_csv = data_io.pa_csv.read_csv
+
+    def spy_read_csv(source, convert_options=None, **kwargs):
+        included.append(list(convert_options.include_columns))
+        return read_csv(source, convert_options=convert_options, **kwargs)
+
+    monkeypatch.setattr(data_io.pa_csv, "read_csv", spy_read_csv)
+    df = load_csv(path, engine="pyarrow", usecols=["lat", "id", "ausente"])
+
+    assert included == [["id", "lat"]]
+    assert list(df.columns) == ["id", "lat"]
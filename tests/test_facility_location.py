@@ -1,6 +1,14 @@
+import numpy as np
 import pandas as pd
+import pytest
 
-from cd_viabilidade.facility_location import SolutionResult, solve_facility_location
+from cd_viabilidade import facility_location
+from cd_viabilidade.facility_location import (
+    FacilityLocationModel,
+    SolutionResult,
+    _greedy_seed,
+    solve_facility_location,
+)
 
 
 def test_solve_facility_location_returns_deterministic_solution():
@@ -55,3 +63,284 @@ def test_forced_existing_and_new_limit_constraints():
     )
 
     assert set(result.open_facilities) == {"E1", "E2", "N1"}
+
+
+def test_exact_solver_settings_without_gap_or_time_limit(monkeypatch):
+    monkeypatch.setattr(facility_location, "linprog", None)
+    cost_matrix = pd.DataFrame(
+        [
+            {"facility_id": "F1", "client_id": "C1", "unit_cost": 1},
+            {"facility_id": "F2", "client_id": "C1", "unit_cost": 5},
+        ]
+    )
+    fixed_costs = pd.DataFrame(
+        [
+            {"facility_id": "F1", "fixed_cost": 1},
+            {"facility_id": "F2", "fixed_cost": 1},
+        ]
+    )
+
+    result = solve_facility_location(cost_matrix, fixed_costs, gap_rel=None, time_limit_seconds=None, threads=1)
+
+    assert result.open_facilities == ["F1"]
+    assert result.total_cost == 2.0
+
+
+def test_cbc_uses_a_single_thread_by_default(monkeypatch):
+    solver_kwargs = []
+    cbc = facility_location.pulp.PULP_CBC_CMD
+
+    def spy_cbc(**kwargs):
+        solver_kwargs.append(kwargs)
+        return cbc(**kwargs)
+
+    monkeypatch.setattr(facility_location.pulp, "PULP_CBC_CMD", spy_cbc)
+    cost_matrix = pd.DataFrame([{"facility_id": "F1", "client_id": "C1", "unit_cost": 1}])
+    fixed_costs = pd.DataFrame([{"facility_id": "F1", "fixed_cost": 1}])
+
+    solve_facility_location(cost_matrix, fixed_costs)
+
+    assert [kwargs["threads"] for kwargs in solver_kwargs] == [1]
+
+
+def test_missing_cost_pair_raises():
+    cost_matrix = pd.DataFrame(
+        [
+            {"facility_id": "F1", "client_id": "C1", "unit_cost": 1},
+            {"facility_id": "F2", "client_id": "C1", "unit_cost": 2},
+            {"facility_id": "F1", "client_id": "C2", "unit_cost": 3},
+        ]
+    )
+    fixed_costs = pd.DataFrame(
+        [
+            {"facility_id": "F1", "fixed_cost": 1},
+            {"facility_id": "F2", "fixed_cost": 1},
+        ]
+    )
+
+    with pytest.raises(ValueError, match="facility_id=F2, client_id=C2"):
+        solve_facility_location(cost_matrix, fixed_costs)
+
+
+def test_tied_costs_still_assign_every_client():
+    cost_matrix = pd.DataFrame(
+        [
+            {"facility_id": "F1", "client_id": "C1", "unit_cost": 2},
+            {"facility_id": "F2", "client_id": "C1", "unit_cost": 2},
+        ]
+    )
+    fixed_costs = pd.DataFrame(
+        [
+            {"facility_id": "F1", "fixed_cost": 0},
+            {"facility_id": "F2", "fixed_cost": 0},
+        ]
+    )
+
+    result = solve_facility_location(cost_matrix, fixed_costs, forced_open_facilities=["F1", "F2"])
+
+    assert set(result.allocation) == {"C1"}
+    assert result.variable_cost == 2.0
+
+
+@pytest.mark.parametrize("strong_formulation", [False, True])
+def test_weak_and_strong_formulations_agree(strong_formulation):
+    cost_matrix = pd.DataFrame(
+        [
+            {"facility_id": f, "client_id": c, "unit_cost": cost}
+            for (f, c), cost in {
+                ("F1", "C1"): 1, ("F1", "C2"): 9, ("F1", "C3"): 4,
+                ("F2", "C1"): 8, ("F2", "C2"): 1, ("F2", "C3"): 3,
+                ("F3", "C1"): 6, ("F3", "C2"): 6, ("F3", "C3"): 6,
+            }.items()
+        ]
+    )
+    fixed_costs = pd.DataFrame(
+        [
+            {"facility_id": "F1", "fixed_cost": 3},
+            {"facility_id": "F2", "fixed_cost": 3},
+            {"facility_id": "F3", "fixed_cost": 1},
+        ]
+    )
+
+    result = solve_facility_location(cost_matrix, fixed_costs, strong_formulation=strong_formulation)
+
+    assert result.open_facilities == ["F1", "F2"]
+    assert result.allocation == {"C1": "F1", "C2": "F2", "C3": "F2"}
+    assert result.total_cost == 11.0
+
+
+def test_warm_start_reuses_previous_solution():
+    cost_matrix = pd.DataFrame(
+        [
+            {"facility_id": "F1", "client_id": "C1", "unit_cost": 1},
+            {"facility_id": "F2", "client_id": "C1", "unit_cost": 5},
+            {"facility_id": "F1", "client_id": "C2", "unit_cost": 5},
+            {"facility_id": "F2", "client_id": "C2", "unit_cost": 1},
+        ]
+    )
+    fixed_costs = pd.DataFrame(
+        [
+            {"facility_id": "F1", "fixed_cost": 1},
+            {"facility_id": "F2", "fixed_cost": 10},
+        ]
+    )
+    previous = solve_facility_location(cost_matrix, fixed_costs, max_new_facilities=1)
+
+    warm = solve_facility_location(cost_matrix, fixed_costs, max_new_facilities=1, warm_start=previous)
+    stale = solve_facility_location(
+        cost_matrix, fixed_costs, forced_open_facilities=["F2"], warm_start=previous
+    )
+
+    assert warm == previous
+    assert set(stale.open_facilities) >= {"F2"}
+
+
+def test_greedy_seed_respects_new_facility_limit():
+    cost_grid = np.array([[1.0, 9.0, 9.0], [9.0, 1.0, 9.0], [9.0, 9.0, 1.0]])
+
+    seed = _greedy_seed(
+        cost_grid,
+        np.zeros(3),
+        ["F1", "F2", "F3"],
+        ["C1", "C2", "C3"],
+        forced_open={"F1"},
+        candidate_set={"F2", "F3"},
+        max_new_facilities=1,
+        min_total_open_facilities=None,
+    )
+
+    assert len(seed.open_facilities) == 2 and "F1" in seed.open_facilities
+    assert seed.total_cost == 11.0
+
+
+def test_model_resolve_after_cost_and_capacity_updates():
+    cost_matrix = pd.DataFrame(
+        [
+            {"facility_id": "F1", "client_id": "C1", "unit_cost": 1},
+            {"facility_id": "F2", "client_id": "C1", "unit_cost": 5},
+            {"facility_id": "F1", "client_id": "C2", "unit_cost": 5},
+            {"facility_id": "F2", "client_id": "C2", "unit_cost": 1},
+        ]
+    )
+    fixed_costs = pd.DataFrame(
+        [
+            {"facility_id": "F1", "fixed_cost": 1},
+            {"facility_id": "F2", "fixed_cost": 10},
+        ]
+    )
+    model = FacilityLocationModel(cost_matrix, fixed_costs, capacity_by_facility={"F1": 2, "F2": 2})
+    assert model.resolve().open_facilities == ["F1"]
+
+    model.update_capacity({"F1": 1, "F2": 2})
+    assert model.resolve().allocation == {"C1": "F1", "C2": "F2"}
+
+    cheaper_f2 = fixed_costs.assign(fixed_cost=[10, 1])
+    model.update_capacity({"F1": 2, "F2": 2})
+    model.update_costs(fixed_costs=cheaper_f2)
+    updated = model.resolve()
+
+    fresh = solve_facility_location(cost_matrix, cheaper_f2, capacity_by_facility={"F1": 2, "F2": 2})
+    assert updated == fresh
+    assert updated.open_facilities == ["F2"]
+
+
+def test_candidate_k_limits_assignment_variables():
+    cost_matrix = pd.DataFrame(
+        [
+            {"facility_id": f, "client_id": c, "unit_cost": cost}
+            for (f, c), cost in {
+                ("F1", "C1"): 1, ("F1", "C2"): 9, ("F1", "C3"): 4,
+                ("F2", "C1"): 8, ("F2", "C2"): 1, ("F2", "C3"): 3,
+                ("F3", "C1"): 6, ("F3", "C2"): 6, ("F3", "C3"): 6,
+            }.items()
+        ]
+    )
+    fixed_costs = pd.DataFrame(
+        [
+            {"facility_id": "F1", "fixed_cost": 3},
+            {"facility_id": "F2", "fixed_cost": 3},
+            {"facility_id": "F3", "fixed_cost": 1},
+        ]
+    )
+
+    model = FacilityLocationModel(cost_matrix, fixed_costs, forced_open_facilities=["F3"], candidate_k=1)
+    result = model.resolve()
+
+    assert {client: set(row) for client, row in model.x.items()} == {
+        "C1": {"F1", "F3"},
+        "C2": {"F2", "F3"},
+        "C3": {"F2", "F3"},
+    }
+    assert result.open_facilities == ["F1", "F2", "F3"]
+    assert result.total_cost == 12.0
+
+
+def test_lp_relaxation_shortcut_matches_cbc(monkeypatch):
+    pytest.importorskip("scipy")
+    cost_matrix = pd.DataFrame(
+        [
+            {"facility_id": "F1", "client_id": "C1", "unit_cost": 1},
+            {"facility_id": "F2", "client_id": "C1", "unit_cost": 5},
+            {"facility_id": "F1", "client_id": "C2", "unit_cost": 5},
+            {"facility_id": "F2", "client_id": "C2", "unit_cost": 1},
+        ]
+    )
+    fixed_costs = pd.DataFrame(
+        [
+            {"facility_id": "F1", "fixed_cost": 1},
+            {"facility_id": "F2", "fixed_cost": 10},
+        ]
+    )
+    model = FacilityLocationModel(cost_matrix, fixed_costs, strong_formulation=True)
+    relaxed = model._solve_lp_relaxation()
+
+    monkeypatch.setattr(facility_location, "linprog", None)
+    solved = solve_facility_location(cost_matrix, fixed_costs, strong_formulation=True)
+
+    assert relaxed == solved
+
+
+def test_weak_formulation_skips_lp_relaxation(monkeypatch):
+    cost_matrix = pd.DataFrame(
+        [
+            {"facility_id": "F1", "client_id": "C1", "unit_cost": 1},
+            {"facility_id": "F2", "client_id": "C1", "unit_cost": 5},
+        ]
+    )
+    fixed_costs = pd.DataFrame([{"facility_id": "F1", "fixed_cost": 1}, {"facility_id": "F2", "fixed_cost": 1}])
+
+    def fail_relaxation(self, tolerance=1e-6):
+        raise AssertionError("relaxação linear não deveria ser resolvida na formulação agregada")
+
+    monkeypatch.setattr(FacilityLocationModel, "_solve_lp_relaxation", fail_relaxation)
+    result = solve_facility_location(cost_matrix, fixed_costs)
+
+    assert result.open_facilities == ["F1"]
+
+
+def test_demand_by_client_overrides_inferred_demand_in_capacity():
+    cost_matrix = pd.DataFrame(
+        [
+            {"facility_id": "F1", "client_id": "C1", "unit_cost": 1, "demanda": 1},
+            {"facility_id": "F2", "client_id": "C1", "unit_cost": 5, "demanda": 1},
+            {"facility_id": "F1", "client_id": "C2", "unit_cost": 1, "demanda": 1},
+            {"facility_id": "F2", "client_id": "C2", "unit_cost": 5, "demanda": 1},
+        ]
+    )
+    fixed_costs = pd.DataFrame(
+        [
+            {"facility_id": "F1", "fixed_cost": 1},
+            {"facility_id": "F2", "fixed_cost": 1},
+        ]
+    )
+
+    model = FacilityLocationModel(
+        cost_matrix,
+        fixed_costs,
+        capacity_by_facility={"F1": 2, "F2": 10},
+        demand_by_client={"C2": 5, "C9": 7},
+    )
+    result = model.resolve()
+
+    assert model.client_demand.tolist() == [1.0, 5.0]
+    assert result.allocation == {"C1": "F1", "C2": "F2"}
@@ -18,6 +18,37 @@ def test_compute_financials_margin():
     assert summary.margin == 40
 
 
+def test_compute_financials_ignores_pairs_missing_from_cost_matrix():
+    assignments = pd.DataFrame({"facility_id": ["F1", "F2", "F9"], "client_id": ["C1", "C2", "C3"]})
+    cost_matrix = pd.DataFrame(
+        {
+            "facility_id": pd.array(["F1", "F2", "F1", "F2"], dtype="string"),
+            "client_id": pd.array(["C1", "C2", "C2", "C1"], dtype="string"),
+            "freight_cost": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    summary = compute_financials(assignments, cost_matrix, unit_revenue=10, fixed_cost=0)
+    assert summary.revenue == 20.0
+    assert summary.variable_cost == 3.0
+
+
+def test_compute_financials_counts_duplicated_cost_pairs_like_a_merge():
+    assignments = pd.DataFrame({"facility_id": ["F1", "F2"], "client_id": ["C1", "C2"]})
+    cost_matrix = pd.DataFrame(
+        {"facility_id": ["F1", "F1", "F2"], "client_id": ["C1", "C1", "C2"], "freight_cost": [1.0, 5.0, 2.0]}
+    )
+    summary = compute_financials(assignments, cost_matrix, unit_revenue=10, fixed_cost=0)
+    assert summary.revenue == 30.0
+    assert summary.variable_cost == 8.0
+
+
+def test_compute_financials_rejects_mismatched_id_dtypes():
+    assignments = pd.DataFrame({"facility_id": [1], "client_id": [2]})
+    cost_matrix = pd.DataFrame({"facility_id": ["1"], "client_id": ["2"], "freight_cost": [3.0]})
+    with pytest.raises(ValueError):
+        compute_financials(assignments, cost_matrix, unit_revenue=10, fixed_cost=0)
+
+
 def test_calculate_npv_constant_cashflow():
     npv = calculate_npv(initial_investment=1000, annual_savings=400, horizon_years=3, discount_rate=0.10)
     assert npv == pytest.approx(-5.26, abs=0.02)
@@ -35,6 +66,11 @@ def test_payback_simple_and_discounted():
     assert discounted == pytest.approx(3.02, abs=0.02)
 
 
+def test_payback_simple_with_negative_year():
+    payback = calculate_payback_simple(initial_investment=1000, annual_savings=[-100, 600, 600], horizon_years=3)
+    assert payback == pytest.approx(2 + 500 / 600)
+
+
 def test_calculate_roi():
     roi = calculate_roi(initial_investment=1000, annual_savings=400, horizon_years=3)
     assert roi == pytest.approx(0.2)
@@ -51,3 +87,14 @@ def test_calculate_financial_indicators_with_list_cashflow():
     assert indicators.payback_simple == pytest.approx(2.7, abs=0.01)
     assert indicators.payback_discounted is None
     assert indicators.roi == pytest.approx(0.15)
+
+
+def test_financial_indicators_accept_one_shot_iterable():
+    indicators = calculate_financial_indicators(
+        initial_investment=1000,
+        annual_savings=(value for value in [300, 350, 500]),
+        horizon_years=3,
+        discount_rate=0.10,
+    )
+    assert indicators.roi == pytest.approx(0.15)
+    assert indicators.payback_simple == pytest.approx(2.7, abs=0.01)
@@ -1,5 +1,12 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
 from types import SimpleNamespace
 
+import pytest
+
 from cd_viabilidade.geocoding import GeocoderTimedOut, GeocodingClient
 
 
@@ -66,3 +73,113 @@ def test_geocode_city_uf_fallback_when_not_found(tmp_path):
     assert result.lon is None
     assert result.warning is not None
     assert "pipeline seguirá" in result.warning
+
+
+def test_sqlite_cache_persists_between_clients(tmp_path):
+    cache_file = tmp_path / "geocode_cache.sqlite"
+    first_geocoder = DummyGeocoder([SimpleNamespace(latitude=-22.9, longitude=-43.2), None])
+    client = GeocodingClient(cache_path=cache_file, geocoder=first_geocoder)
+    client.geocode_city_uf("Rio de Janeiro", "RJ")
+    client.geocode_city_uf("Cidade Inexistente", "ZZ")
+
+    second_geocoder = DummyGeocoder([])
+    reloaded = GeocodingClient(cache_path=cache_file, geocoder=second_geocoder)
+    found = reloaded.geocode_city_uf("Rio de Janeiro", "RJ")
+    missing = reloaded.geocode_city_uf("Cidade Inexistente", "ZZ")
+
+    assert found.source == "cache" and (found.lat, found.lon) == (-22.9, -43.2)
+    assert missing.source == "cache" and missing.found is False and missing.warning
+    assert second_geocoder.calls == []
+
+
+def test_sqlite_cache_imports_legacy_json_cache_on_first_use(tmp_path):
+    legacy = {"recife|pe": {"cidade": "Recife", "uf": "PE", "lat": -8.05, "lon": -34.9, "found": True, "warning": None}}
+    (tmp_path / "geocode_cache.json").write_text(json.dumps(legacy), encoding="utf-8")
+    geocoder = DummyGeocoder([])
+
+    with GeocodingClient(cache_path=tmp_path / "geocode_cache.sqlite", geocoder=geocoder) as client:
+        result = client.geocode_city_uf("Recife", "PE")
+
+    assert result.source == "cache" and (result.lat, result.lon) == (-8.05, -34.9)
+    assert geocoder.calls == []
+
+
+def test_client_close_releases_sqlite_connection(tmp_path):
+    with GeocodingClient(cache_path=tmp_path / "geocode_cache.sqlite", geocoder=DummyGeocoder([])) as client:
+        pass
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        len(client._cache)
+
+
+def test_geocode_many_deduplicates_and_batches_cache(tmp_path):
+    cache_file = tmp_path / "geocode_cache.sqlite"
+    geocoder = DummyGeocoder(
+        [
+            SimpleNamespace(latitude=-23.55, longitude=-46.63),
+            SimpleNamespace(latitude=-25.43, longitude=-49.27),
+            SimpleNamespace(latitude=-30.03, longitude=-51.23),
+        ]
+    )
+    client = GeocodingClient(cache_path=cache_file, geocoder=geocoder)
+    client.geocode_city_uf("São Paulo", "SP")
+
+    results = asyncio.run(
+        client.geocode_many(
+            [("Curitiba", "PR"), ("São Paulo", "SP"), ("Porto Alegre", "RS"), ("curitiba", "pr")],
+            max_concurrency=2,
+            min_interval_seconds=0.0,
+        )
+    )
+
+    assert [result.found for result in results] == [True] * 4
+    assert results[1].source == "cache"
+    assert results[0] == results[3]
+    assert len(geocoder.calls) == 3
+    assert len(client._cache) == 3
+
+
+def test_geocode_many_spaces_timeout_retries_with_first_attempts(tmp_path):
+    class FlakyGeocoder:
+        def __init__(self):
+            self.call_times = []
+            self._seen = set()
+            self._lock = threading.Lock()
+
+        def geocode(self, query):
+            with self._lock:
+                self.call_times.append(time.monotonic())
+                first_attempt = query not in self._seen
+                self._seen.add(query)
+            if first_attempt:
+                raise GeocoderTimedOut("timeout")
+            return SimpleNamespace(latitude=-10.0, longitude=-40.0)
+
+    geocoder = FlakyGeocoder()
+    client = GeocodingClient(
+        cache_path=tmp_path / "geocode_cache.sqlite",
+        geocoder=geocoder,
+        backoff_seconds=0.0,
+        sleep_fn=lambda _: None,
+    )
+
+    results = asyncio.run(
+        client.geocode_many([("A", "SP"), ("B", "RJ"), ("C", "MG")], max_concurrency=3, min_interval_seconds=0.05)
+    )
+
+    assert all(result.found for result in results)
+    assert len(geocoder.call_times) == 6
+    gaps = [later - earlier for earlier, later in zip(geocoder.call_times, geocoder.call_times[1:])]
+    assert min(gaps) >= 0.045
+
+
+def test_repeated_cache_hits_reuse_result(tmp_path):
+    geocoder = DummyGeocoder([SimpleNamespace(latitude=-3.73, longitude=-38.52)])
+    client = GeocodingClient(cache_path=tmp_path / "geocode_cache.sqlite", geocoder=geocoder)
+
+    client.geocode_city_uf("Fortaleza", "CE")
+    first_hit = client.geocode_city_uf("Fortaleza", "CE")
+    second_hit = client.geocode_city_uf(" fortaleza ", "ce")
+
+    assert first_hit.source == "cache"
+    assert second_hit is first_hit
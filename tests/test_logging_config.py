@@ -6,3 +6,7 @@ from cd_viabilidade.logging_config import configure_logging
 def test_configure_logging_returns_logger():
     logger = configure_logging(logging.INFO, "x")
     assert logger.name == "x"
+
+
+def test_configure_logging_is_memoized_per_name():
+    assert configure_logging(logger_name="y") is configure_logging(logger_name="y")
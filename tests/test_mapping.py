@@ -8,3 +8,17 @@ def test_build_map(tmp_path):
     clients = pd.DataFrame([{"client_id": "C1", "lat": -23.6, "lon": -46.7}])
     output = build_map(facilities, clients, tmp_path / "map.html")
     assert output.exists()
+
+
+def test_build_map_draws_assignment_lines(tmp_path):
+    facilities = pd.DataFrame(
+        [{"facility_id": "F1", "lat": -23.5, "lon": -46.6}, {"id": "F2", "lat": -22.9, "lon": -43.2}]
+    )
+    clients = pd.DataFrame([{"client_id": "C1", "lat": -23.6, "lon": -46.7}])
+    assignments = pd.DataFrame([{"client_id": "C1", "facility_id": "F2"}, {"client_id": "C9", "facility_id": "F1"}])
+
+    output = build_map(facilities, clients, tmp_path / "map.html", selected_facilities=["F2"], assignments=assignments)
+
+    html = output.read_text(encoding="utf-8")
+    assert "Candidato F2" in html
+    assert html.count("L.polyline") == 1
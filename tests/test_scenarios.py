@@ -2,6 +2,7 @@ import math
 
 import pandas as pd
 
+from cd_viabilidade.cost_matrix import build_distance_grid
 from cd_viabilidade.scenarios import (
     DEFAULT_SCENARIOS,
     ScenarioConfig,
@@ -31,6 +32,14 @@ def test_apply_demand_scenario():
     clients = pd.DataFrame([{"client_id": "C1", "demand": 10}])
     out = apply_demand_scenario(clients, {"C1": 1.5})
     assert out.loc[0, "demand_scenario"] == 15
+    assert "demand_scenario" not in clients.columns
+
+
+def test_apply_demand_scenario_inplace():
+    clients = pd.DataFrame([{"client_id": "C1", "demand": 10}, {"client_id": "C2", "demand": 4}])
+    out = apply_demand_scenario(clients, {"C2": 0.5}, inplace=True)
+    assert out is clients
+    assert clients["demand_scenario"].tolist() == [10.0, 2.0]
 
 
 def test_apply_scenario_and_recompute_costs_scales_demand_and_costs():
@@ -68,3 +77,44 @@ def test_batch_execution_returns_required_scenarios_and_consistent_aggregates():
 
     assert base_row["total_freight_cost"] == expected_base_cost
     assert base_row["total_demand"] == expected_base_demand
+
+
+def test_batch_with_precomputed_distance_grid_matches_default():
+    candidates, demand_points = _sample_inputs()
+    grid = build_distance_grid(candidates, demand_points)
+
+    default = run_scenarios_batch(candidates, demand_points, tarifa_km=1.0)
+    reused = run_scenarios_batch(candidates, demand_points, tarifa_km=1.0, distance_grid=grid)
+
+    pd.testing.assert_frame_equal(reused, default)
+
+
+def test_batch_scaled_totals_match_recomputed_cost_matrices():
+    candidates, demand_points = _sample_inputs()
+
+    comparative = run_scenarios_batch(candidates, demand_points, tarifa_km=1.0).set_index("scenario")
+
+    for name, scenario in DEFAULT_SCENARIOS.items():
+        matrix = apply_scenario_and_recompute_costs(candidates, demand_points, scenario, tarifa_km=1.0)
+        assert math.isclose(comparative.loc[name, "total_freight_cost"], matrix["freight_cost"].sum(), rel_tol=1e-6)
+        assert math.isclose(comparative.loc[name, "total_demand"], matrix["demanda"].sum(), abs_tol=1e-4)
+
+
+def test_facility_limit_scenarios_share_cost_totals():
+    candidates, demand_points = _sample_inputs()
+
+    comparative = run_scenarios_batch(candidates, demand_points, tarifa_km=1.0).set_index("scenario")
+    totals = comparative[["total_demand", "total_freight_cost", "avg_cost_per_unit"]]
+
+    pd.testing.assert_series_equal(totals.loc["base"], totals.loc["1_novo_cd"], check_names=False)
+    pd.testing.assert_series_equal(totals.loc["base"], totals.loc["2_novos_cds"], check_names=False)
+
+
+def test_apply_demand_scenario_sparse_and_dense_paths_agree():
+    clients = pd.DataFrame({"client_id": [f"C{i}" for i in range(100)], "demanda": range(100)})
+    sparse = apply_demand_scenario(clients, {"C3": 2.0, "C7": 0.333})
+    dense = apply_demand_scenario(clients, {f"C{i}": 1.0 for i in range(10)} | {"C3": 2.0, "C7": 0.333})
+
+    pd.testing.assert_series_equal(sparse["demand_scenario"], dense["demand_scenario"])
+    assert sparse.loc[3, "demand_scenario"] == 6.0
+    assert sparse.loc[7, "demand_scenario"] == 2.33